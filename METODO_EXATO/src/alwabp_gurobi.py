@@ -1,6 +1,8 @@
 import sys
 import os
+import math
 from pathlib import Path
+import numpy as np
 from gurobipy import *
 
 # ============================================================
@@ -10,7 +12,9 @@ class ALWABPInstance:
     def __init__(self, n, k, task_times, precedences):
         self.num_tasks = n
         self.num_workers = k
-        self.task_times = task_times      # task_times[w][i]
+        # task_times[w][i] como ndarray (k, n) contíguo: um bloco de
+        # float64 no lugar de k listas de PyFloats
+        self.task_times = np.ascontiguousarray(task_times, dtype=np.float64)
         self.precedences = precedences    # pares (i,j)
 
     @classmethod
@@ -21,128 +25,446 @@ class ALWABPInstance:
                 raise ValueError("Erro ao ler n")
             n = int(line)
 
-            # matriz t_iw (n linhas, k colunas)
-            raw = []
-            k = 0
-            for _ in range(n):
-                line = f.readline().strip()
-                times = []
-                for x in line.split():
-                    if x.lower() == 'inf':
-                        times.append(1e12)  # Usar um valor muito grande para Inf
-                    else:
-                        times.append(float(x))
-                raw.append(times)
-                if k == 0:
-                    k = len(times)
-                elif len(times) != k:
-                    raise ValueError("Quantidade inconsistente de tempos")
+            # matriz t_iw (n linhas, k colunas) — parse vetorizado;
+            # 'Inf' vira um valor muito grande (trabalhador incapaz)
+            raw = np.loadtxt(f, max_rows=n, dtype=np.float64, ndmin=2)
+            if raw.shape[0] != n:
+                raise ValueError("Quantidade inconsistente de tempos")
+            k = raw.shape[1]
+            raw[~np.isfinite(raw)] = 1e12
 
             # transposição: task_times[w][i]
-            task_times = [[raw[i][w] for i in range(n)] for w in range(k)]
+            task_times = raw.T
 
             # precedências (converter para índices 0-based)
+            pairs = np.loadtxt(f, dtype=np.int64, ndmin=2)
             prec = []
-            while True:
-                line = f.readline().strip()
-                if not line:
-                    break
-                i, j = map(int, line.split())
+            for i, j in pairs:
                 if i == -1 and j == -1:
                     break
                 # Converter de 1-based para 0-based
-                prec.append((i-1, j-1))
+                prec.append((int(i) - 1, int(j) - 1))
 
         return cls(n, k, task_times, prec)
 
+# ============================================================
+# Caches por processo: ambiente do Gurobi e estruturas de
+# precedência (reaproveitadas entre instâncias da mesma família)
+# ============================================================
+_grb_env = None
+_prec_cache = {}
+
+
+def _shared_env():
+    """Ambiente Gurobi único por processo (licença/startup pagos uma vez)."""
+    global _grb_env
+    if _grb_env is None:
+        _grb_env = Env(empty=True)
+        _grb_env.setParam("OutputFlag", 0)
+        _grb_env.start()
+    return _grb_env
+
+
+def _precedence_structures(n, prec):
+    """
+    Ordem topológica, preds/succs transitivos e predecessores diretos,
+    memoizados por (n, precedências): instâncias da mesma família só
+    diferem nos tempos e compartilham o grafo.
+    """
+    key = (n, tuple(prec))
+    hit = _prec_cache.get(key)
+    if hit is None:
+        order = _topological_order(n, prec)
+        if order is None:
+            hit = (None, None, None, None)
+        else:
+            preds, succs = _transitive_sets(n, prec, order)
+            direct_preds = [[] for _ in range(n)]
+            for i, j in prec:
+                direct_preds[j].append(i)
+            hit = (order, preds, succs, direct_preds)
+        _prec_cache[key] = hit
+    return hit
+
+
+# ============================================================
+# Pré-processamento: poda de pares (tarefa, estação)
+# ============================================================
+def _topological_order(n, prec):
+    """Ordem topológica (Kahn). Retorna None se houver ciclo."""
+    succs = [[] for _ in range(n)]
+    in_degree = [0] * n
+    for i, j in prec:
+        succs[i].append(j)
+        in_degree[j] += 1
+
+    queue = [i for i in range(n) if in_degree[i] == 0]
+    order = []
+    while queue:
+        i = queue.pop()
+        order.append(i)
+        for j in succs[i]:
+            in_degree[j] -= 1
+            if in_degree[j] == 0:
+                queue.append(j)
+
+    return order if len(order) == n else None
+
+
+def _transitive_sets(n, prec, order):
+    """Conjuntos de predecessores/sucessores transitivos por tarefa."""
+    preds = [set() for _ in range(n)]
+    succs = [set() for _ in range(n)]
+    direct_preds = [[] for _ in range(n)]
+    direct_succs = [[] for _ in range(n)]
+    for i, j in prec:
+        direct_preds[j].append(i)
+        direct_succs[i].append(j)
+
+    for j in order:
+        for i in direct_preds[j]:
+            preds[j].add(i)
+            preds[j] |= preds[i]
+    for i in reversed(order):
+        for j in direct_succs[i]:
+            succs[i].add(j)
+            succs[i] |= succs[j]
+
+    return preds, succs
+
+
+def _greedy_assign(inst, worker_station, order, direct_preds, least_loaded):
+    """
+    Atribui tarefas em ordem topológica dada uma permutação de
+    trabalhadores. least_loaded escolhe a estação capaz menos
+    carregada; caso contrário, a mais cedo possível (mais robusta
+    contra incapacidades de sucessores).
+    """
+    n = inst.num_tasks
+    m = inst.num_workers
+    TW = inst.task_times
+
+    task_station = [-1] * n
+    loads = [0.0] * m
+
+    for i in order:
+        min_s = max((task_station[p] for p in direct_preds[i]), default=0)
+        best_s = None
+        for s in range(min_s, m):
+            w = worker_station[s]
+            if TW[w][i] >= 1e12:
+                continue
+            if best_s is None:
+                best_s = s
+                if not least_loaded:
+                    break
+            elif loads[s] + TW[w][i] < loads[best_s] + TW[worker_station[best_s]][i]:
+                best_s = s
+        if best_s is None:
+            return None
+        task_station[i] = best_s
+        loads[best_s] += TW[worker_station[best_s]][i]
+
+    return max(loads), task_station
+
+def greedy_feasible_solution(inst):
+    """
+    Heurística construtiva gulosa: testa algumas permutações de
+    trabalhadores e duas políticas de escolha de estação, devolvendo
+    a melhor solução factível encontrada.
+
+    Retorna (cycle, task_station, worker_station) ou None se falhar.
+    """
+    n = inst.num_tasks
+    m = inst.num_workers
+
+    order, _, _, direct_preds = _precedence_structures(n, inst.precedences)
+    if order is None:
+        return None
+
+    identity = list(range(m))
+    permutations = [identity, identity[::-1]]
+    permutations += [identity[r:] + identity[:r] for r in range(1, m)]
+
+    best = None
+    for worker_station in permutations:
+        for least_loaded in (True, False):
+            result = _greedy_assign(inst, worker_station, order,
+                                    direct_preds, least_loaded)
+            if result is not None and (best is None or result[0] < best[0]):
+                best = (result[0], result[1], list(worker_station))
+
+    return best
+
+
+def compute_lower_bound(inst):
+    """
+    Limitante inferior combinatório do tempo de ciclo:
+    - LB1: trabalho mínimo total dividido pelas m estações;
+    - LB2: toda tarefa custa ao menos seu tempo mínimo;
+    - LB3: alguma estação recebe ao menos ceil(n/m) tarefas, que
+      custam ao menos a soma dos ceil(n/m) menores tempos mínimos.
+    """
+    n = inst.num_tasks
+    m = inst.num_workers
+    TW = inst.task_times
+
+    t_min = sorted(min(TW[w][i] for w in range(m)) for i in range(n))
+    if not t_min:
+        return 0.0
+
+    lb1 = math.ceil(sum(t_min) / m)
+    lb2 = max(t_min)
+    lb3 = sum(t_min[:math.ceil(n / m)])
+    return float(max(lb1, lb2, lb3))
+
+
+def compute_station_windows(inst, cycle_ub):
+    """
+    Janela [E_i, L_i] de estações válidas por tarefa, dado um limitante
+    superior cycle_ub do tempo de ciclo: a tarefa i e todos os seus
+    predecessores (transitivos) precisam caber nas estações 0..s, cada
+    uma com capacidade cycle_ub — analogamente para os sucessores.
+    Usa os tempos mínimos por tarefa, portanto a poda é válida para
+    qualquer solução com ciclo <= cycle_ub.
+    """
+    n = inst.num_tasks
+    m = inst.num_workers
+    TW = inst.task_times
+
+    order, preds, succs, _ = _precedence_structures(n, inst.precedences)
+    if order is None or cycle_ub <= 0:
+        return [0] * n, [m - 1] * n
+
+    t_min = [min(TW[w][i] for w in range(m)) for i in range(n)]
+
+    E = [0] * n
+    L = [m - 1] * n
+    for i in range(n):
+        head = t_min[i] + sum(t_min[p] for p in preds[i])
+        tail = t_min[i] + sum(t_min[s] for s in succs[i])
+        E[i] = max(0, math.ceil(head / cycle_ub) - 1)
+        L[i] = min(m - 1, m - math.ceil(tail / cycle_ub))
+
+    return E, L
+
+
 # ============================================================
 # Construção e solução do modelo de Gurobi
 # ============================================================
-def solve_alwabp_gurobi(inst: ALWABPInstance, time_limit=1200):
+def solve_alwabp_gurobi(inst: ALWABPInstance, time_limit=1200, mip_gap=1e-4,
+                        threads=None, presolve=2, symmetry=2, cuts=2,
+                        mip_focus=2, formulation="indicator"):
     n = inst.num_tasks
     k = inst.num_workers
     m = k   # número de estações = número de trabalhadores
     TW = inst.task_times
     prec = inst.precedences
 
-    model = Model("ALWABP")
+    model = Model("ALWABP", env=_shared_env())
     model.Params.OutputFlag = 0  # Reduzir output no console
     model.Params.TimeLimit = time_limit  # 20 minutos = 1200 segundos
     model.Params.LogToConsole = 0  # Desativar log do Gurobi no console
-    
+
+    # Ajustes de desempenho do solver (ver README/relatório):
+    # presolve e cortes agressivos, detecção de simetria entre
+    # estações e foco em provar otimalidade.
+    model.Params.MIPGap = mip_gap
+    model.Params.Presolve = presolve
+    model.Params.Symmetry = symmetry
+    model.Params.Cuts = cuts
+    model.Params.MIPFocus = mip_focus
+    if threads is not None:
+        model.Params.Threads = threads
+
     S = range(m)
     W = range(k)
     I = range(n)
 
+    TW_np = np.asarray(TW, dtype=np.float64)
+
     # ------------------------------------------------------------
-    # Variáveis
+    # Variáveis (API matricial: expressões montadas como arrays
+    # NumPy contíguos, sem LinExpr elemento a elemento)
     # ------------------------------------------------------------
-    x = model.addVars(n, m, vtype=GRB.BINARY, name="x")
-    y = model.addVars(k, m, vtype=GRB.BINARY, name="y")
-    z = model.addVars(k, n, m, vtype=GRB.BINARY, name="z")
+    x = model.addMVar((n, m), vtype=GRB.BINARY, name="x")
+    y = model.addMVar((k, m), vtype=GRB.BINARY, name="y")
     c = model.addVar(vtype=GRB.CONTINUOUS, lb=0, name="cycle")
 
+    # ------------------------------------------------------------
+    # Poda de pares (tarefa, estação) fora da janela [E_i, L_i]
+    # ------------------------------------------------------------
+    greedy = greedy_feasible_solution(inst)
+    if greedy is not None:
+        E, L = compute_station_windows(inst, greedy[0])
+        x_ub = np.ones((n, m))
+        for i in I:
+            x_ub[i, :E[i]] = 0.0
+            x_ub[i, L[i]+1:] = 0.0
+        x.UB = x_ub
+
+    # ------------------------------------------------------------
+    # Limitantes do ciclo (LB combinatório, UB da gulosa) e warm
+    # start com a solução gulosa
+    # ------------------------------------------------------------
+    c.LB = compute_lower_bound(inst)
+
+    if greedy is not None:
+        greedy_cycle, task_station, worker_station = greedy
+        # o ciclo da gulosa é atingível, logo é um UB válido para c
+        c.UB = greedy_cycle
+        x_start = np.zeros((n, m))
+        x_start[np.arange(n), task_station] = 1.0
+        y_start = np.zeros((k, m))
+        y_start[worker_station, np.arange(m)] = 1.0
+        x.Start = x_start
+        y.Start = y_start
+        c.Start = greedy_cycle
+
     # ------------------------------------------------------------
     # 1. Cada tarefa em exatamente uma estação
     # ------------------------------------------------------------
-    for i in I:
-        model.addConstr(sum(x[i,s] for s in S) == 1)
+    model.addConstr(x.sum(axis=1) == 1, name="task_assign")
 
     # ------------------------------------------------------------
     # 2. Cada trabalhador em exatamente uma estação
     # ------------------------------------------------------------
-    for w in W:
-        model.addConstr(sum(y[w,s] for s in S) == 1)
+    model.addConstr(y.sum(axis=1) == 1, name="worker_assign")
 
     # ------------------------------------------------------------
     # 3. Cada estação tem exatamente 1 trabalhador
     # ------------------------------------------------------------
-    for s in S:
-        model.addConstr(sum(y[w,s] for w in W) == 1)
+    model.addConstr(y.sum(axis=0) == 1, name="station_worker")
 
     # ------------------------------------------------------------
-    # 4. Precedências
+    # 4. Precedências: posição (índice de estação) de i <= de j.
+    #    Usa o fecho transitivo (memoizado): as precedências
+    #    indiretas explícitas fortalecem a relaxação linear.
     # ------------------------------------------------------------
-    for (i,j) in prec:
+    pos = x @ np.arange(1, m + 1)
+    order, trans_preds, _, _ = _precedence_structures(n, prec)
+    if order is not None:
+        closure = [(i, j) for j in I for i in sorted(trans_preds[j])]
+    else:
+        closure = [(i, j) for (i, j) in prec]
+    for (i, j) in closure:
         if 0 <= i < n and 0 <= j < n:  # Verificação de segurança
-            lhs = sum((s+1)*x[i,s] for s in S)
-            rhs = sum((s+1)*x[j,s] for s in S)
-            model.addConstr(lhs <= rhs)
+            model.addConstr(pos[i] <= pos[j], name=f"prec[{i},{j}]")
 
     # ------------------------------------------------------------
-    # 5. Linearização z[w,i,s] = x[i,s] * y[w,s]
+    # Quebra de simetria:
+    # - trabalhadores com linhas de tempo idênticas são intercambiáveis,
+    #   então ordenamos suas estações pelo índice do trabalhador;
+    # - sem precedências as estações também são intercambiáveis e
+    #   podemos ordená-las pela menor tarefa atribuída.
     # ------------------------------------------------------------
-    for w in W:
+    station_of = y @ np.arange(m)
+    for w1 in W:
+        for w2 in range(w1 + 1, k):
+            if np.array_equal(TW_np[w1], TW_np[w2]):
+                model.addConstr(station_of[w1] <= station_of[w2],
+                                name=f"sym_worker[{w1},{w2}]")
+
+    if not prec:
+        # Representante canônico: estações não vazias ordenadas pela
+        # menor tarefa atribuída (vazias no fim). Nele a estação s só
+        # contém tarefas i >= s — as estações 0..s-1 têm menores
+        # tarefas distintas e menores que a da estação s —, então
+        # x[i,s] com s > i pode ser fixado em 0 sem cortar todas as
+        # soluções ótimas de nenhuma classe de equivalência.
         for i in I:
-            for s in S:
-                model.addConstr(z[w,i,s] <= x[i,s])
-                model.addConstr(z[w,i,s] <= y[w,s])
-                model.addConstr(z[w,i,s] >= x[i,s] + y[w,s] - 1)
+            for s in range(i + 1, m):
+                x[i, s].UB = 0
 
     # ------------------------------------------------------------
-    # 6. Restrição de tempo por estação
+    # 5. Restrição de tempo por estação
+    #    Se o trabalhador w ocupa a estação s, o tempo da estação
+    #    com os tempos de w deve respeitar o ciclo c. Ambas as
+    #    formulações evitam as variáveis z[w,i,s] e suas 3
+    #    restrições de linearização:
+    #    - "indicator": uma restrição indicadora por (w, s);
+    #    - "mccormick": variáveis u[i,s] >= x[i,s] * t_w(s),i com
+    #      envelope de McCormick (O(n*m) variáveis contínuas e uma
+    #      relaxação linear mais justa que a linearização por z).
     # ------------------------------------------------------------
-    for s in S:
-        model.addConstr(sum(TW[w][i] * z[w,i,s] for w in W for i in I) <= c)
+    # Capacidades calculadas uma única vez: o coeficiente 1e12 dos
+    # pares incapazes nunca entra na matriz do modelo (estragaria o
+    # condicionamento numérico); eles são proibidos na restrição 6.
+    capable = {w: np.flatnonzero(TW_np[w] < 1e12) for w in W}
+    incapable = np.argwhere(TW_np >= 1e12)
+
+    if formulation == "mccormick":
+        # Tempos com incapacidades zeradas: o par (w, i) incapaz já é
+        # proibido na restrição 6, então zerar não relaxa nada.
+        Tc = np.where(TW_np < 1e12, TW_np, 0.0)
+        big_m = Tc.max(axis=0)  # maior tempo viável de cada tarefa
+
+        u = model.addMVar((n, m), vtype=GRB.CONTINUOUS, lb=0, name="u")
+        # u[i,s] >= t_eff[i,s] - M_i * (1 - x[i,s]), com
+        # t_eff[i,s] = sum_w TW[w][i] * y[w,s]
+        model.addConstr(u >= Tc.T @ y - big_m[:, None] * (1 - x),
+                        name="mccormick")
+        model.addConstr(u.sum(axis=0) <= c, name="station_time")
+    else:
+        for s in S:
+            for w in W:
+                idx = capable[w]
+                model.addGenConstrIndicator(
+                    y[w,s].item(), True,
+                    TW_np[w, idx] @ x[idx, s] <= c
+                )
 
     # ------------------------------------------------------------
-    # 7. Incapacidades (twi = ∞)
+    # 6. Incapacidades (twi = ∞): tarefa i não pode ficar na
+    #    estação ocupada pelo trabalhador incapaz
     # ------------------------------------------------------------
-    for w in W:
-        for i in I:
-            if TW[w][i] >= 1e12:  # interpreta como "incapaz"
-                for s in S:
-                    model.addConstr(z[w,i,s] == 0)
+    for (w, i) in incapable:
+        model.addConstr(x[i, :] + y[w, :] <= 1, name=f"incap[{w},{i}]")
 
     # ------------------------------------------------------------
     # Objetivo: minimizar ciclo
     # ------------------------------------------------------------
     model.setObjective(c, GRB.MINIMIZE)
 
+    # ------------------------------------------------------------
+    # Cortes combinatórios via callback (lazy):
+    # se nenhum trabalhador executa i e j juntas dentro do ciclo do
+    # incumbente, i e j não podem dividir estação em nenhuma solução
+    # melhor. A tabela pair_min é calculada uma única vez; a cada
+    # incumbente novo, os pares que passam a ser incompatíveis geram
+    # cortes x[i,s] + x[j,s] <= 1 para todas as estações.
+    # ------------------------------------------------------------
+    pair_min = np.min(TW_np[:, :, None] + TW_np[:, None, :], axis=0)
+    np.fill_diagonal(pair_min, 0.0)
+
+    model.Params.LazyConstraints = 1
+    model.Params.PreCrush = 1
+    # Restrições lazy desligam parte do presolve; tolerâncias mais
+    # justas evitam que o valor ótimo venha com ruído (ex.: 19.9999...)
+    model.Params.IntFeasTol = 1e-9
+    model.Params.FeasibilityTol = 1e-9
+    model.Params.OptimalityTol = 1e-9
+
+    cut_state = {"threshold": float('inf')}
+
+    def _alwabp_pair_cuts(mdl, where):
+        if where != GRB.Callback.MIPSOL:
+            return
+        obj = mdl.cbGet(GRB.Callback.MIPSOL_OBJ)
+        if obj >= cut_state["threshold"]:
+            return
+        new_i, new_j = np.nonzero(
+            (pair_min > obj + 1e-6) & (pair_min <= cut_state["threshold"] + 1e-6)
+        )
+        for i, j in zip(new_i, new_j):
+            if i < j:
+                mdl.cbLazy(x[i, :] + x[j, :] <= 1)
+        cut_state["threshold"] = obj
+
     # ------------------------------------------------------------
     # Resolve
     # ------------------------------------------------------------
-    model.optimize()
+    model.optimize(_alwabp_pair_cuts)
     
     # ============================================================
     # Coleta resultados
@@ -179,44 +501,31 @@ def solve_alwabp_gurobi(inst: ALWABPInstance, time_limit=1200):
         resultados.append(f"Tempo de execução: {model.Runtime:.2f} segundos")
         resultados.append(f"Limite de tempo: {time_limit} segundos")
         
+        # Valores das variáveis em lote (um único getAttr por matriz,
+        # sem cruzar a fronteira Python/C elemento a elemento)
+        assign = x.X > 0.5                               # assign[i, s]
+        worker_by_station = (y.X > 0.5).argmax(axis=0)   # trabalhador de cada estação
+        station_times = np.array(
+            [TW_np[worker_by_station[s], assign[:, s]].sum() for s in S]
+        )
+
         # Trabalhador por estação
         resultados.append("\nTrabalhador por estação:")
-        worker_by_station = {}
         for s in S:
-            for w in W:
-                if y[w,s].X > 0.5:
-                    resultados.append(f" Estaçao {s+1}: trabalhador {w+1}")
-                    worker_by_station[s] = w
-                    break
-        
+            resultados.append(f" Estaçao {s+1}: trabalhador {worker_by_station[s]+1}")
+
         # Tarefas por estação (mostrar como 1-based para o usuário)
         resultados.append("\nTarefas por estação:")
         for s in S:
-            tasks_s = [i+1 for i in I if x[i,s].X > 0.5]
+            tasks_s = (np.flatnonzero(assign[:, s]) + 1).tolist()
             resultados.append(f" Estaçao {s+1} (trabalhador {worker_by_station[s]+1}): {tasks_s}")
-            
-            # Calcular tempo de trabalho por estação
-            station_time = 0
-            w = worker_by_station[s]
-            for i in I:
-                if x[i,s].X > 0.5:
-                    station_time += TW[w][i]
-            resultados.append(f"  Tempo total na estação: {station_time}")
-            
+            resultados.append(f"  Tempo total na estação: {station_times[s]}")
+
         # Informações de balanceamento
-        station_times = []
-        for s in S:
-            w = worker_by_station[s]
-            station_time = 0
-            for i in I:
-                if x[i,s].X > 0.5:
-                    station_time += TW[w][i]
-            station_times.append(station_time)
-        
-        if station_times:
-            max_time = max(station_times)
-            min_time = min(station_times)
-            avg_time = sum(station_times) / len(station_times)
+        if len(station_times):
+            max_time = station_times.max()
+            min_time = station_times.min()
+            avg_time = station_times.mean()
             balanceamento = (max_time - avg_time) / avg_time * 100
             
             resultados.append("\nANÁLISE DE BALANCEAMENTO:")
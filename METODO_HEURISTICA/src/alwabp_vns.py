@@ -2,14 +2,142 @@ import sys
 import math
 import random
 import time
+import itertools
+from bisect import insort
+from collections import deque
 from typing import List, Tuple, Dict, Any
 import argparse
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 from config import VNS_MAX_ITER, VNS_K_MAX, DEFAULT_SEED
 
 # Valor usado para representar tarefa impossível/incapacidade
 INF = float('inf')
 
 
+if njit is not None:
+    # Kernel da avaliação compilado pelo numba (cache=True guarda o
+    # binário em __pycache__, evitando recompilar a cada processo).
+    # Sem fastmath: as checagens de incapacidade comparam com Inf e
+    # fastmath autoriza o compilador a assumir que Inf não ocorre.
+    #
+    # Só o evaluate é JIT-compilado: é o único laço que ainda percorre
+    # as n tarefas. As buscas locais ficam em Python de propósito —
+    # operam por deltas O(1)/O(grau) com bitsets de int arbitrário e
+    # reduções NumPy em lote, padrões que o numba não acelera (e os
+    # bitsets nem compila).
+    # nogil: o kernel não toca objetos Python, então libera o GIL
+    # enquanto roda — de graça hoje, e deixa a porta aberta para
+    # threads avaliarem vizinhos em paralelo se um dia valer a pena
+    @njit(cache=True, nogil=True)
+    def _evaluate_kernel(task_station, worker_station, task_times,
+                         pred_i, pred_j, m, n):
+        station_times = np.zeros(m)
+
+        for i in range(n):
+            s = task_station[i]
+            if s < 0 or s >= m:
+                return False, np.inf, station_times
+
+        for p in range(pred_i.shape[0]):
+            if task_station[pred_i[p]] > task_station[pred_j[p]]:
+                return False, np.inf, station_times
+
+        for i in range(n):
+            s = task_station[i]
+            t = task_times[worker_station[s], i]
+            if t == np.inf:
+                return False, np.inf, station_times
+            station_times[s] += t
+
+        cycle = 0.0
+        for s in range(m):
+            if station_times[s] > cycle:
+                cycle = station_times[s]
+
+        return True, cycle, station_times
+else:
+    _evaluate_kernel = None
+
+
+# Cache de avaliações por atribuição (limitado, evicção FIFO). A chave
+# não inclui a instância: vns() o esvazia no início de cada execução.
+_EVAL_CACHE_MAX = 1024
+_eval_cache: dict = {}
+
+
+_kernel_warm = False
+
+
+def _warmup_kernel():
+    """
+    Dispara a compilação JIT do kernel numa instância trivial, para o
+    tempo de compilação não ser cobrado da primeira avaliação real
+    (nem entrar no tempo da SI).
+    """
+    global _kernel_warm
+    if _kernel_warm or _evaluate_kernel is None:
+        return
+    _evaluate_kernel(
+        np.zeros(1, dtype=np.intp),
+        np.zeros(1, dtype=np.intp),
+        np.ones((1, 1), dtype=np.float32),
+        np.empty(0, dtype=np.intp),
+        np.empty(0, dtype=np.intp),
+        1, 1,
+    )
+    _kernel_warm = True
+
+
+def _evaluate_arrays(inst: 'ALWABPInstance', t, w_arr):
+    """
+    Avalia uma atribuição dada pelos arrays (tarefa->estação,
+    estação->trabalhador), sem materializar uma ALWABPSolution:
+    retorna (factível, C_max, tempos_por_estação). É o miolo comum do
+    evaluate e do shaking — que só constrói o objeto de solução para
+    vizinhos aceitos, sem gerar lixo por tentativa rejeitada.
+    """
+    n = inst.num_tasks
+    m = inst.num_workers
+
+    if _evaluate_kernel is not None:
+        feasible, cycle, station_times = _evaluate_kernel(
+            t, w_arr, inst.task_times, inst.pred_i, inst.pred_j, m, n
+        )
+        if not feasible:
+            return False, INF, np.full(m, INF)
+        return True, float(cycle), station_times
+
+    # Verifica se índices de estação são válidos (cobre também o -1
+    # de tarefa não alocada)
+    if ((t < 0) | (t >= m)).any():
+        return False, INF, np.full(m, INF)
+
+    # Precedências: station(i) <= station(j) para todos os pares
+    if inst.pred_i.size and (t[inst.pred_i] > t[inst.pred_j]).any():
+        return False, INF, np.full(m, INF)
+
+    # Tempo de cada tarefa com o trabalhador da sua estação
+    w = w_arr[t]
+    per_task = inst.task_times[w, np.arange(n)]
+
+    # Incapacidade
+    if np.isinf(per_task).any():
+        return False, INF, np.full(m, INF)
+
+    station_times = np.bincount(t, weights=per_task, minlength=m)
+
+    # redução SIMD do NumPy + conversão única para float nativo
+    cycle = float(station_times.max()) if m > 0 else 0.0
+    return True, cycle, station_times
+
+
 class ALWABPInstance:
     """
     Representa uma instância do problema ALWABP.
@@ -27,7 +155,15 @@ class ALWABPInstance:
                  task_times: List[List[float]], precedences: List[Tuple[int, int]]):
         self.num_tasks = num_tasks
         self.num_workers = num_workers
-        self.task_times = task_times
+        # Matriz de tempos como ndarray (k, n) C-contíguo: cada linha é
+        # um trabalhador, então as somas por estação leem a linha em
+        # sequência; task_times[w][i] segue funcionando. float32 basta
+        # (tempos inteiros pequenos, Inf para incapacidade) e move
+        # metade dos bytes nos laços quentes
+        self.task_times = np.ascontiguousarray(
+            np.asarray(task_times, dtype=np.float32).reshape(num_workers,
+                                                             num_tasks)
+        )
         self.precedences = precedences
 
         # Estruturas auxiliares
@@ -38,75 +174,128 @@ class ALWABPInstance:
             self.successors[i].append(j)
             self.predecessors[j].append(i)
 
+        # Máscara de capacidade por tarefa: bit w ligado <=> trabalhador
+        # w consegue executar a tarefa i. O teste de incapacidade nos
+        # laços quentes vira um único AND de bits, sem carregar floats
+        self.capable_mask = [0] * num_tasks
+        if num_tasks > 0:
+            for w, i in zip(*np.nonzero(np.isfinite(self.task_times))):
+                self.capable_mask[i] |= 1 << int(w)
+
+        # Versões 0-indexadas por tarefa (tuplas imutáveis), para as
+        # checagens locais de precedência da busca local
+        self.pred_of = tuple(
+            tuple(p - 1 for p in self.predecessors[i + 1])
+            for i in range(num_tasks)
+        )
+        self.succ_of = tuple(
+            tuple(q - 1 for q in self.successors[i + 1])
+            for i in range(num_tasks)
+        )
+
+        # Mesmos conjuntos como bitsets (bit t ligado <=> t é pred/succ
+        # direto de i): o teste de precedência de um movimento vira dois
+        # ANDs contra um prefixo de estações, sem laço por vizinho
+        self.preds_mask = [0] * num_tasks
+        self.succs_mask = [0] * num_tasks
+        for i in range(num_tasks):
+            for p in self.pred_of[i]:
+                self.preds_mask[i] |= 1 << p
+            for q in self.succ_of[i]:
+                self.succs_mask[i] |= 1 << q
+
+        # Precedências 0-indexadas em pares de arrays, para checar todas
+        # de uma vez com comparações vetorizadas
+        if precedences:
+            prec_arr = np.asarray(precedences, dtype=np.intp) - 1
+            self.pred_i = np.ascontiguousarray(prec_arr[:, 0])
+            self.pred_j = np.ascontiguousarray(prec_arr[:, 1])
+        else:
+            self.pred_i = np.empty(0, dtype=np.intp)
+            self.pred_j = np.empty(0, dtype=np.intp)
+
     @classmethod
-    def from_stdin(cls) -> 'ALWABPInstance':
+    def from_text(cls, text: str) -> 'ALWABPInstance':
         """
-        Lê uma instância completa do ALWABP a partir do stdin.
+        Constrói uma instância a partir do conteúdo completo do arquivo.
         Formato:
             n
             t_1...t_k   (repetido n vezes)
             i j         (precedências)
             -1 -1       (fim)
-        """
-        # Número de tarefas
-        try:
-            line = sys.stdin.readline().strip()
-            if not line:
-                raise EOFError("Fim inesperado ao ler n.")
-            num_tasks = int(line)
-        except Exception as e:
-            print(f"Erro ao ler n: {e}", file=sys.stderr)
-            sys.exit(1)
 
-        # Matriz de tempos (n linhas, k colunas)
-        task_times_raw = []
-        num_workers = 0
+        Levanta ValueError em caso de formato inválido (uso em processo,
+        sem derrubar o interpretador).
+        """
+        all_lines = text.splitlines()
+        if not all_lines or not all_lines[0].strip():
+            raise ValueError("Fim inesperado ao ler n.")
+        num_tasks = int(all_lines[0].strip())
 
-        for _ in range(num_tasks):
-            try:
-                line = sys.stdin.readline().strip()
-                if not line:
-                    raise EOFError("Fim inesperado ao ler tempos.")
-                times = [float(x) for x in line.split()]
-                task_times_raw.append(times)
-
-                if num_workers == 0:
-                    num_workers = len(times)
-                elif len(times) != num_workers:
-                    raise ValueError("Linhas com quantidade inconsistente de tempos.")
-            except Exception as e:
-                print(f"Erro na matriz de tempos: {e}", file=sys.stderr)
-                sys.exit(1)
+        if len(all_lines) < 1 + num_tasks:
+            raise ValueError("Fim inesperado ao ler tempos.")
 
-        # Transposição: task_times[w][i]
-        task_times_transposed = [
-            [task_times_raw[i][w] for i in range(num_tasks)]
-            for w in range(num_workers)
-        ] if num_tasks > 0 else []
+        # Matriz de tempos (n linhas, k colunas): o bloco inteiro vira
+        # um único fluxo de tokens convertido numa chamada só de
+        # np.array, sem n conversões linha a linha
+        num_workers = 0
+        task_times_transposed = []
+        if num_tasks > 0:
+            num_workers = len(all_lines[1].split())
+            tokens = " ".join(all_lines[1:1 + num_tasks]).split()
+            if len(tokens) != num_tasks * num_workers:
+                raise ValueError("Linhas com quantidade inconsistente de tempos.")
+            raw = np.array(tokens, dtype=np.float32).reshape(num_tasks,
+                                                             num_workers)
+            # Transposição única: task_times[w][i], C-contíguo
+            task_times_transposed = np.ascontiguousarray(raw.T)
 
         # Precedências
         precedences = []
-        while True:
-            line = sys.stdin.readline()
-            if not line:
-                break
+        for line in all_lines[1 + num_tasks:]:
             line = line.strip()
             if not line:
                 continue
             parts = line.split()
             try:
                 i, j = map(int, parts)
-                if i == -1 and j == -1:
-                    break
-                precedences.append((i, j))
             except Exception as e:
                 # Linha inválida (exceto comentários)
-                if line and not line.startswith("#"):
-                    print(f"Erro ao ler precedência '{line}': {e}", file=sys.stderr)
-                    sys.exit(1)
+                if line.startswith("#"):
+                    continue
+                raise ValueError(f"Erro ao ler precedência '{line}': {e}")
+            if i == -1 and j == -1:
+                break
+            precedences.append((i, j))
 
         return cls(num_tasks, num_workers, task_times_transposed, precedences)
 
+    @classmethod
+    def from_file(cls, path: str) -> 'ALWABPInstance':
+        """
+        Lê e parseia uma instância direto do arquivo, num único read
+        com buffer largo (as maiores instâncias TON/WEE entram inteiras
+        numa leitura).
+        """
+        with open(path, "r", buffering=1 << 20) as f:
+            return cls.from_text(f.read())
+
+    @classmethod
+    def from_stdin(cls) -> 'ALWABPInstance':
+        """
+        Lê uma instância completa do ALWABP a partir do stdin
+        (modo linha de comando; erros de formato encerram o processo).
+
+        A leitura é do buffer binário cru com um único decode: para as
+        instâncias grandes (TON/WEE) isso evita o decoder incremental
+        do TextIOWrapper sobre o fluxo inteiro.
+        """
+        try:
+            return cls.from_text(sys.stdin.buffer.read().decode())
+        except ValueError as e:
+            print(f"Erro ao ler instância: {e}", file=sys.stderr)
+            sys.exit(1)
+
 
 class ALWABPSolution:
     """
@@ -117,15 +306,70 @@ class ALWABPSolution:
     """
 
     def __init__(self, instance: ALWABPInstance,
-                 task_station_assignment: List[int],
-                 worker_station_assignment: List[int]):
+                 task_station_assignment,
+                 worker_station_assignment):
         self.instance = instance
-        self.task_station_assignment = task_station_assignment
-        self.worker_station_assignment = worker_station_assignment
+        # Atribuições como arrays de inteiros; quem passa um ndarray
+        # transfere a posse (não é copiado). Cópias de vizinhos são
+        # .copy() (memcpy contíguo, sem box de PyObject); intp em vez de
+        # um dtype menor porque esses arrays indexam a matriz de tempos,
+        # e índices não-intp seriam convertidos a cada fancy indexing
+        self.task_station_assignment = np.asarray(
+            task_station_assignment, dtype=np.intp
+        )
+        self.worker_station_assignment = np.asarray(
+            worker_station_assignment, dtype=np.intp
+        )
 
         self.is_feasible = False
         self.cycle_time = INF
-        self.station_times: List[float] = []
+        self.station_times = np.empty(0)
+        # Chave escalar de comparação: cycle_time (infactível já vale
+        # INF), mantida junto com a avaliação para o __lt__ do laço de
+        # aceitação virar uma única comparação de floats
+        self._key = INF
+        # True quando is_feasible/cycle_time/station_times já refletem a
+        # atribuição atual (via evaluate ou avaliação incremental): as
+        # buscas locais pulam a reavaliação de soluções já avaliadas
+        self._evaluated = False
+        # Inversão tarefa->estação, construída sob demanda e reaproveitada
+        # entre soluções vizinhas (copy-on-write nas estações alteradas)
+        self._tasks_in_station = None
+
+    def tasks_in_station(self) -> list:
+        """
+        Lista de tarefas por estação (índices 0-based, em ordem
+        crescente dentro de cada estação). Construída uma vez e
+        remendada incrementalmente nos movimentos aceitos das buscas
+        locais, em vez de varrer as n tarefas a cada consulta.
+        """
+        if self._tasks_in_station is None:
+            tsa = self.task_station_assignment
+            m = self.instance.num_workers
+            if tsa.size and not (tsa < 0).any():
+                # Agrupamento por argsort estável: as tarefas ordenadas
+                # por estação são fatiadas nos limites dados pelo
+                # searchsorted, sem os n appends do laço Python
+                order = np.argsort(tsa, kind='stable')
+                starts = np.searchsorted(tsa[order], np.arange(m + 1))
+                inv = [order[starts[s]:starts[s + 1]].tolist()
+                       for s in range(m)]
+            else:
+                # Caminho para atribuições parciais: tarefas ainda não
+                # atribuídas (estação -1) ficam fora da inversão, em
+                # vez de cair na última estação via índice negativo
+                inv = [[] for _ in range(m)]
+                for i, s in enumerate(tsa):
+                    if s >= 0:
+                        inv[s].append(i)
+            self._tasks_in_station = inv
+        return self._tasks_in_station
+
+    def _mark_infeasible(self):
+        self.is_feasible = False
+        self.cycle_time = INF
+        self._key = INF
+        self.station_times = np.full(self.instance.num_workers, INF)
 
     def evaluate(self):
         """
@@ -134,61 +378,62 @@ class ALWABPSolution:
         - Checa incapacidade
         - Soma tempos por estação
         - Define C_max (cycle_time)
-        """
-        inst = self.instance
-        n = inst.num_tasks
-        m = inst.num_workers
-
-        # Verifica se índices de estação são válidos
-        if any((s < 0 or s >= m) for s in self.task_station_assignment):
-            self.is_feasible = False
-            self.cycle_time = INF
-            self.station_times = [INF] * m
-            return
 
-        # Precedências
-        for i1, j1 in inst.precedences:
-            i = i1 - 1
-            j = j1 - 1
-            si = self.task_station_assignment[i]
-            sj = self.task_station_assignment[j]
-
-            if si == -1 or sj == -1 or si > sj:
-                self.is_feasible = False
-                self.cycle_time = INF
-                self.station_times = [INF] * m
-                return
+        Com numba disponível, tudo roda num único kernel compilado;
+        caso contrário, cai na versão vetorizada com NumPy.
 
-        # Soma tempos por estação
-        station_times = [0.0] * m
-        tasks_in_station: Dict[int, List[int]] = {s: [] for s in range(m)}
+        Resultados são memoizados por atribuição (cache limitado do
+        módulo): o shaking revisita estados próximos quando as
+        tentativas falham, e avaliações repetidas viram um lookup.
 
-        for i in range(n):
-            s = self.task_station_assignment[i]
-            tasks_in_station[s].append(i)
+        Soluções já avaliadas (flag _evaluated) retornam sem tocar os
+        arrays — as buscas locais chamam evaluate defensivamente sobre
+        soluções que o chamador já avaliou.
+        """
+        if self._evaluated:
+            return
 
-        for s in range(m):
-            w = self.worker_station_assignment[s]
-            total = 0.0
-            for i in tasks_in_station[s]:
-                t = inst.task_times[w][i]
-                if t >= INF:
-                    self.is_feasible = False
-                    self.cycle_time = INF
-                    self.station_times = [INF] * m
-                    return
-                total += t
-            station_times[s] = total
+        key = (self.task_station_assignment.tobytes(),
+               self.worker_station_assignment.tobytes())
+        hit = _eval_cache.get(key)
+        if hit is not None:
+            self.is_feasible, self.cycle_time, self.station_times = hit
+            self._key = self.cycle_time
+            self._evaluated = True
+            return
 
+        self._evaluate_uncached()
+        self._evaluated = True
+
+        _eval_cache[key] = (self.is_feasible, self.cycle_time,
+                            self.station_times)
+        if len(_eval_cache) > _EVAL_CACHE_MAX:
+            # FIFO: dicts preservam ordem de inserção
+            _eval_cache.pop(next(iter(_eval_cache)))
+
+    def _evaluate_uncached(self):
+        feasible, cycle, station_times = _evaluate_arrays(
+            self.instance, self.task_station_assignment,
+            self.worker_station_assignment
+        )
+        if not feasible:
+            self._mark_infeasible()
+            return
         self.is_feasible = True
         self.station_times = station_times
-        self.cycle_time = max(station_times) if station_times else 0.0
+        # float nativo: a comparação do __lt__ fica entre floats do
+        # interpretador, sem escalares NumPy boxed no caminho quente
+        self.cycle_time = cycle
+        self._key = cycle
 
     def __lt__(self, other: 'ALWABPSolution') -> bool:
-        """Comparação entre soluções: factível > infactível; menor cycle_time é melhor."""
-        if self.is_feasible != other.is_feasible:
-            return self.is_feasible
-        return self.cycle_time < other.cycle_time
+        """Comparação entre soluções: factível > infactível; menor cycle_time é melhor.
+
+        Reduzida a uma comparação da chave escalar _key (cycle_time, com
+        INF para infactível), mantida por evaluate e pelos vizinhos das
+        buscas locais — sem desvios por solução no laço de aceitação.
+        """
+        return self._key < other._key
 
     def to_output_format(self) -> str:
         """
@@ -221,24 +466,39 @@ class ALWABPSolution:
 # ------------------------------------------------------
 
 def check_precedence_feasibility(instance: ALWABPInstance,
-                                 task_station_assignment: List[int]) -> bool:
-    """Valida precedências para uma atribuição de tarefas."""
-    m = instance.num_workers
-    # índices de estação válidos
-    if any((s < 0 or s >= m) for s in task_station_assignment):
+                                 task_station_assignment) -> bool:
+    """
+    Valida precedências para uma atribuição de tarefas — uma comparação
+    vetorizada sobre os pares pred_i/pred_j pré-computados na instância.
+    """
+    arr = np.asarray(task_station_assignment)
+    # índices de estação válidos (cobre o -1 de tarefa não alocada)
+    if ((arr < 0) | (arr >= instance.num_workers)).any():
         return False
+    return not (arr[instance.pred_i] > arr[instance.pred_j]).any()
+
 
-    for i1, j1 in instance.precedences:
-        i = i1 - 1
-        j = j1 - 1
-        si = task_station_assignment[i]
-        sj = task_station_assignment[j]
-        if si == -1 or sj == -1 or si > sj:
+def move_preserves_precedence(instance: ALWABPInstance,
+                              task_station_assignment, i: int,
+                              s_new: int) -> bool:
+    """
+    Checa só as precedências que envolvem a tarefa i na estação s_new —
+    O(grau(i)) em vez de varrer todas as arestas. Partindo de uma
+    atribuição factível, qualquer violação criada por um movimento passa
+    por uma tarefa movida, então esta checagem local basta para
+    descartar o vizinho.
+    """
+    for p in instance.pred_of[i]:
+        if task_station_assignment[p] > s_new:
+            return False
+    for q in instance.succ_of[i]:
+        if task_station_assignment[q] < s_new:
             return False
     return True
 
 
-def generate_initial_solution(instance: ALWABPInstance) -> ALWABPSolution:
+def generate_initial_solution(instance: ALWABPInstance,
+                              rng: random.Random = random) -> ALWABPSolution:
     """
     Gera solução inicial:
     - Permuta trabalhadores aleatoriamente
@@ -249,16 +509,18 @@ def generate_initial_solution(instance: ALWABPInstance) -> ALWABPSolution:
 
     # Trabalhadores embaralhados
     workers = list(range(m))
-    random.shuffle(workers)
+    rng.shuffle(workers)
     worker_station_assignment = workers
 
-    # Ordem topológica
-    in_degree = {i: len(instance.predecessors[i + 1]) for i in range(n)}
-    queue = [i for i in range(n) if in_degree[i] == 0]
+    # Ordem topológica (deque: popleft é O(1), pop(0) em lista é O(n));
+    # graus de entrada numa lista plana indexada por tarefa 0-based,
+    # sem o hash do dict por decremento
+    in_degree = [len(instance.pred_of[i]) for i in range(n)]
+    queue = deque(i for i in range(n) if in_degree[i] == 0)
     topo = []
 
     while queue:
-        i = queue.pop(0)
+        i = queue.popleft()
         topo.append(i)
         for j1 in instance.successors[i + 1]:
             j = j1 - 1
@@ -277,8 +539,8 @@ def generate_initial_solution(instance: ALWABPInstance) -> ALWABPSolution:
         alocado = False
         for s in range(m):
             w = worker_station_assignment[s]
-            # incapacidade
-            if instance.task_times[w][i] >= INF:
+            # incapacidade: teste de bit na máscara, sem ler o float
+            if not (instance.capable_mask[i] >> w) & 1:
                 continue
 
             ok = True
@@ -301,11 +563,12 @@ def generate_initial_solution(instance: ALWABPInstance) -> ALWABPSolution:
     return sol
 
 
-def generate_initial_solution_multi(instance: ALWABPInstance, num_starts: int = 3) -> ALWABPSolution:
+def generate_initial_solution_multi(instance: ALWABPInstance, num_starts: int = 3,
+                                    rng: random.Random = random) -> ALWABPSolution:
     """Gera várias soluções iniciais gulosas e retorna a melhor."""
     best = None
     for _ in range(num_starts):
-        sol = generate_initial_solution(instance)
+        sol = generate_initial_solution(instance, rng)
         if best is None or sol < best:
             best = sol
     return best
@@ -318,7 +581,9 @@ def generate_initial_solution_multi(instance: ALWABPInstance, num_starts: int =
 def vns(instance: ALWABPInstance,
         max_iter: int,
         k_max: int,
-        time_limit: float = None) -> Tuple[ALWABPSolution, ALWABPSolution]:
+        time_limit: float = None,
+        rng: random.Random = random,
+        target_cmax: float = None) -> Tuple[ALWABPSolution, ALWABPSolution]:
     """
     Executa o VNS:
     - Gera solução inicial
@@ -328,8 +593,23 @@ def vns(instance: ALWABPInstance,
     Se time_limit (segundos) for especificado, interrompe a busca
     quando o tempo estourar e devolve o melhor s_best encontrado
     até o momento.
+
+    Se target_cmax (ótimo conhecido ou lower bound) for especificado, a
+    busca para assim que s_best o atinge: não há como melhorar, então
+    as iterações restantes seriam tempo jogado fora.
+
+    rng é o gerador usado em toda a busca: um random.Random local por
+    execução evita o estado global do módulo random (compartilhado por
+    todas as replicações do mesmo worker).
     """
-    s_initial = generate_initial_solution_multi(instance, num_starts=3)
+    # O cache de avaliações vale para UMA instância por vez
+    _eval_cache.clear()
+
+    def target_reached(sol: ALWABPSolution) -> bool:
+        return (target_cmax is not None and sol.is_feasible
+                and sol.cycle_time <= target_cmax + 1e-9)
+
+    s_initial = generate_initial_solution_multi(instance, num_starts=3, rng=rng)
     s_best = s_initial
     s_current = s_initial
 
@@ -337,9 +617,11 @@ def vns(instance: ALWABPInstance,
     iteration = 0
 
     while iteration < max_iter:
-        # Verifica limite de tempo no início de cada iteração
+        # Verifica limite de tempo e alvo no início de cada iteração
         if time_limit is not None and (time.time() - start_time) >= time_limit:
             break
+        if target_reached(s_best):
+            break
 
         k = 1
         while k <= k_max:
@@ -347,13 +629,16 @@ def vns(instance: ALWABPInstance,
             if time_limit is not None and (time.time() - start_time) >= time_limit:
                 return s_initial, s_best
 
-            s_prime = shaking(s_current, k)
+            s_prime = shaking(s_current, k, rng)
             s_prime_prime = vnd(s_prime)
 
             if s_prime_prime < s_current:
                 s_current = s_prime_prime
                 if s_current < s_best:
                     s_best = s_current
+                    # Alvo atingido: provadamente ótimo, nada a melhorar
+                    if target_reached(s_best):
+                        return s_initial, s_best
                 k = 1
             else:
                 k += 1
@@ -363,7 +648,8 @@ def vns(instance: ALWABPInstance,
     return s_initial, s_best
 
 
-def shaking(solution: ALWABPSolution, k: int) -> ALWABPSolution:
+def shaking(solution: ALWABPSolution, k: int,
+            rng: random.Random = random) -> ALWABPSolution:
     """
     Gera um vizinho por perturbação controlada.
     Garante:
@@ -375,72 +661,110 @@ def shaking(solution: ALWABPSolution, k: int) -> ALWABPSolution:
     n = inst.num_tasks
     m = inst.num_workers
 
-    base_t = solution.task_station_assignment
-    base_w = solution.worker_station_assignment
+    # Uma única cópia de trabalho para todas as tentativas: cada
+    # perturbação muda poucas células, registradas para desfazer em
+    # caso de rejeição (sem realocar O(n) por tentativa)
+    new_t = solution.task_station_assignment.copy()
+    new_w = solution.worker_station_assignment.copy()
 
     # Tenta algumas vezes gerar um vizinho factível
     for _ in range(10):
-        new_t = list(base_t)
-        new_w = list(base_w)
+        undo_t = []  # (índice, valor anterior), desfeito em ordem reversa
+        undo_w = []
 
         if k == 1 and n >= 2:
-            # 1 swap de tarefas
-            i1, i2 = random.sample(range(n), 2)
+            # 1 swap de tarefas: par distinto com dois randrange, sem o
+            # range+lista que rng.sample aloca a cada chamada
+            i1 = rng.randrange(n)
+            i2 = rng.randrange(n - 1)
+            if i2 >= i1:
+                i2 += 1
+            undo_t += [(i1, new_t[i1]), (i2, new_t[i2])]
             new_t[i1], new_t[i2] = new_t[i2], new_t[i1]
 
         elif k == 2 and n > 0:
             # algumas reatribuições de tarefa
             num_moves = min(3, n)
             for _m in range(num_moves):
-                i = random.randrange(n)
-                s_new = random.randrange(m)
+                i = rng.randrange(n)
+                s_new = rng.randrange(m)
+                undo_t.append((i, new_t[i]))
                 new_t[i] = s_new
 
         elif k == 3 and m >= 2:
             # 1 swap de trabalhadores + 2 reatribuições de tarefas
-            s1, s2 = random.sample(range(m), 2)
+            s1 = rng.randrange(m)
+            s2 = rng.randrange(m - 1)
+            if s2 >= s1:
+                s2 += 1
+            undo_w += [(s1, new_w[s1]), (s2, new_w[s2])]
             new_w[s1], new_w[s2] = new_w[s2], new_w[s1]
 
             num_moves = min(2, n)
             for _m in range(num_moves):
-                i = random.randrange(n)
-                s_new = random.randrange(m)
+                i = rng.randrange(n)
+                s_new = rng.randrange(m)
+                undo_t.append((i, new_t[i]))
                 new_t[i] = s_new
         else:
             # perturbação simples
             if n > 0:
-                i = random.randrange(n)
+                i = rng.randrange(n)
+                undo_t.append((i, new_t[i]))
                 new_t[i] = (new_t[i] + 1) % m
 
-        # checagem rápida de incapacidade
-        feasible_cap = True
-        for i in range(n):
-            s = new_t[i]
-            w = new_w[s]
-            if inst.task_times[w][i] >= INF:
-                feasible_cap = False
+        # Pré-rejeição O(grau) das tarefas movidas: precedências entre
+        # pares não tocados continuam válidas, então uma violação local
+        # já condena o vizinho sem pagar o evaluate completo
+        ok = True
+        for idx, _old in undo_t:
+            if not move_preserves_precedence(inst, new_t, idx, new_t[idx]):
+                ok = False
                 break
-        if not feasible_cap:
-            continue
 
-        # precedência
-        if not check_precedence_feasibility(inst, new_t):
-            continue
-
-        s_prime = ALWABPSolution(inst, new_t, new_w)
-        s_prime.evaluate()
-        if s_prime.is_feasible:
-            return s_prime
+        if ok:
+            # Uma única passada fundida: o kernel já faz limites,
+            # precedência, incapacidade e soma com early-exit — e a
+            # avaliação roda direto sobre os arrays (com o mesmo cache
+            # do evaluate), de modo que só um vizinho aceito vira objeto
+            # ALWABPSolution; tentativas rejeitadas não geram lixo
+            key = (new_t.tobytes(), new_w.tobytes())
+            hit = _eval_cache.get(key)
+            if hit is None:
+                hit = _evaluate_arrays(inst, new_t, new_w)
+                _eval_cache[key] = hit
+                if len(_eval_cache) > _EVAL_CACHE_MAX:
+                    _eval_cache.pop(next(iter(_eval_cache)))
+            feasible, cycle, station_times = hit
+            if feasible:
+                s_prime = ALWABPSolution(inst, new_t, new_w)
+                s_prime.is_feasible = True
+                s_prime.station_times = station_times
+                s_prime.cycle_time = cycle
+                s_prime._key = cycle
+                s_prime._evaluated = True
+                return s_prime
+
+        # rejeitado: restaura só as células tocadas
+        for idx, old in reversed(undo_t):
+            new_t[idx] = old
+        for idx, old in reversed(undo_w):
+            new_w[idx] = old
 
     # fallback: não conseguiu gerar vizinho melhor
     return solution
 
 
+# Até este número de estações, o VND resolve a atribuição de
+# trabalhadores de forma exata enumerando as m! permutações (<= 720)
+_EXACT_WORKER_ASSIGN_MAX_M = 6
+
+
 def vnd(solution: ALWABPSolution) -> ALWABPSolution:
     """
     Executa VND:
     l=1: Task Reassignment
-    l=2: Worker Swap
+    l=2: Worker Swap (exato por enumeração quando m é pequeno)
     (first improvement)
     """
     s_current = solution
@@ -450,6 +774,8 @@ def vnd(solution: ALWABPSolution) -> ALWABPSolution:
     while l <= l_max:
         if l == 1:
             s_prime = local_search_task_reassignment(s_current)
+        elif solution.instance.num_workers <= _EXACT_WORKER_ASSIGN_MAX_M:
+            s_prime = local_search_worker_assign(s_current)
         else:
             s_prime = local_search_worker_swap(s_current)
 
@@ -466,15 +792,20 @@ def local_search_task_reassignment(solution: ALWABPSolution) -> ALWABPSolution:
     """
     Busca local focada em aliviar a estação crítica (first improvement).
     Reatribui tarefas entre estações respeitando precedências e incapacidade.
+
+    Avaliação incremental: mover a tarefa i de s_old para s_new só muda
+    os tempos dessas duas estações, e só as precedências da própria i
+    precisam ser rechecadas — O(1) por vizinho, sem reavaliar tudo. A
+    solução vizinha só é materializada quando de fato melhora.
     """
     inst = solution.instance
     n = inst.num_tasks
     m = inst.num_workers
 
     s_current = solution
+    s_current.evaluate()
 
     while True:
-        s_current.evaluate()
         if not s_current.is_feasible:
             return s_current
 
@@ -483,42 +814,114 @@ def local_search_task_reassignment(solution: ALWABPSolution) -> ALWABPSolution:
         if any(t >= INF for t in station_times):
             return s_current
 
+        task_station = s_current.task_station_assignment
+        worker_station = s_current.worker_station_assignment
+
         # Estação crítica (maior tempo)
-        worst_station = max(range(m), key=lambda s: station_times[s])
+        # redução única em C, sem m chamadas do closure por iteração
+        worst_station = int(station_times.argmax())
         improved = False
 
-        # Tarefas atualmente na estação crítica
-        tasks_in_worst = [
-            i for i in range(n)
-            if s_current.task_station_assignment[i] == worst_station
-        ]
+        # Tarefas atualmente na estação crítica (inversão mantida na
+        # solução, sem varrer as n tarefas), das que mais pesam na
+        # estação para as que menos pesam: mover a maior contribuição
+        # tende a achar a primeira melhora mais cedo
+        w_worst = worker_station[worst_station]
+        tasks_by_station = s_current.tasks_in_station()
+        tasks_in_worst = sorted(
+            tasks_by_station[worst_station],
+            key=lambda i: -inst.task_times[w_worst, i]
+        )
+
+        # Estações candidatas da mais folgada para a mais cheia
+        stations_order = sorted(range(m), key=lambda s: station_times[s])
+
+        cycle_time = s_current.cycle_time
+
+        # Prefixos de estações como bitsets: prefix[s] tem o bit t
+        # ligado <=> a tarefa t está em alguma estação <= s
+        prefix = [0] * m
+        acc = 0
+        for s in range(m):
+            for t_ in tasks_by_station[s]:
+                acc |= 1 << t_
+            prefix[s] = acc
+
+        # Máximo das estações fora do par (crítica, destino): derivado
+        # do maior e do segundo maior com a crítica mascarada, para o
+        # C_max candidato sair em O(1) — sem copy+max de m posições por
+        # vizinho testado
+        rest = station_times.copy()
+        rest[worst_station] = -np.inf
+        top1 = int(rest.argmax())
+
+        # Dominância: com o gargalo empatado em outra estação, nenhum
+        # movimento que alivia só a crítica reduz o C_max
+        if rest[top1] >= cycle_time:
+            break
+
+        rest_max = np.full(m, rest[top1])
+        rest[top1] = -np.inf
+        rest_max[top1] = rest.max()
+
+        worst_time = station_times[worst_station]
 
         for i in tasks_in_worst:
-            s_old = s_current.task_station_assignment[i]
-            for s_new in range(m):
+            s_old = worst_station
+            t_old = inst.task_times[w_worst, i]
+            preds_mask = inst.preds_mask[i]
+            succs_mask = inst.succs_mask[i]
+            mask_i = inst.capable_mask[i]
+
+            for s_new in stations_order:
                 if s_new == s_old:
                     continue
 
-                new_t = list(s_current.task_station_assignment)
-                new_t[i] = s_new
-
-                # precedência
-                if not check_precedence_feasibility(inst, new_t):
+                # incapacidade rápida (teste de bit, sem ler o float)
+                if not (mask_i >> worker_station[s_new]) & 1:
                     continue
+                t_new = inst.task_times[worker_station[s_new], i]
 
-                # incapacidade rápida
-                w_new = s_current.worker_station_assignment[s_new]
-                if inst.task_times[w_new][i] >= INF:
+                # poda exata: se a estação destino já estoura o C_max
+                # atual com a tarefa, o movimento não pode melhorar
+                if station_times[s_new] + t_new >= cycle_time:
                     continue
 
-                s_neighbor = ALWABPSolution(
-                    inst,
-                    new_t,
-                    list(s_current.worker_station_assignment)
-                )
-                s_neighbor.evaluate()
+                # precedência branchless: todos os preds em estações
+                # <= s_new e nenhum succ em estação < s_new
+                if preds_mask & ~prefix[s_new]:
+                    continue
+                if s_new > 0 and succs_mask & prefix[s_new - 1]:
+                    continue
 
-                if s_neighbor.is_feasible and s_neighbor < s_current:
+                # delta: só as duas estações envolvidas mudam de tempo,
+                # e o máximo das demais já está pré-computado
+                new_cmax = max(rest_max[s_new],
+                               worst_time - t_old,
+                               station_times[s_new] + t_new)
+
+                if new_cmax < s_current.cycle_time:
+                    new_cmax = float(new_cmax)
+                    new_times = station_times.copy()
+                    new_times[s_old] -= t_old
+                    new_times[s_new] += t_new
+                    new_t = task_station.copy()
+                    new_t[i] = s_new
+                    # o array de trabalhadores não muda: compartilhado
+                    s_neighbor = ALWABPSolution(inst, new_t, worker_station)
+                    s_neighbor.is_feasible = True
+                    s_neighbor.station_times = new_times
+                    s_neighbor.cycle_time = new_cmax
+                    s_neighbor._key = new_cmax
+                    s_neighbor._evaluated = True
+
+                    # remenda a inversão: só as duas estações mudam
+                    # (listas das demais são compartilhadas)
+                    new_inv = list(tasks_by_station)
+                    new_inv[s_old] = [t for t in new_inv[s_old] if t != i]
+                    new_inv[s_new] = list(new_inv[s_new])
+                    insort(new_inv[s_new], i)
+                    s_neighbor._tasks_in_station = new_inv
                     s_current = s_neighbor
                     improved = True
                     break
@@ -531,17 +934,87 @@ def local_search_task_reassignment(solution: ALWABPSolution) -> ALWABPSolution:
     return s_current
 
 
+def local_search_worker_assign(solution: ALWABPSolution) -> ALWABPSolution:
+    """
+    Atribuição exata de trabalhadores às estações para a partição de
+    tarefas corrente, por enumeração das m! permutações — viável para o
+    m pequeno do ALWABP e melhor que reinícios de first improvement.
+
+    A tabela (m, m) de tempo de cada estação com cada trabalhador sai
+    em O(m·n) (uma redução bincount por linha); cada permutação então
+    custa O(m) com early-exit assim que o máximo parcial deixa de bater
+    o melhor C_max. Incapacidade vira Inf na tabela e elimina a
+    permutação sozinha.
+    """
+    inst = solution.instance
+    m = inst.num_workers
+    n = inst.num_tasks
+
+    s_current = solution
+    s_current.evaluate()
+    if not s_current.is_feasible or n == 0:
+        return s_current
+
+    task_station = s_current.task_station_assignment
+
+    # cost[w, s] = tempo da estação s se operada pelo trabalhador w
+    cost = np.empty((m, m))
+    for w in range(m):
+        cost[w] = np.bincount(task_station, weights=inst.task_times[w],
+                              minlength=m)
+
+    best_cmax = s_current.cycle_time
+    best_perm = None
+    for perm in itertools.permutations(range(m)):
+        cmax = 0.0
+        for s in range(m):
+            c = cost[perm[s], s]
+            if c > cmax:
+                cmax = c
+                if cmax >= best_cmax:
+                    break
+        else:
+            best_cmax = cmax
+            best_perm = perm
+
+    if best_perm is None:
+        return s_current
+
+    new_w = np.asarray(best_perm, dtype=np.intp)
+    new_times = cost[new_w, np.arange(m)]
+    # partição de tarefas intacta: array e inversão compartilhados
+    s_neighbor = ALWABPSolution(inst, task_station, new_w)
+    s_neighbor.is_feasible = True
+    s_neighbor.station_times = new_times
+    s_neighbor.cycle_time = float(best_cmax)
+    s_neighbor._key = s_neighbor.cycle_time
+    s_neighbor._evaluated = True
+    s_neighbor._tasks_in_station = s_current._tasks_in_station
+    return s_neighbor
+
+
 def local_search_worker_swap(solution: ALWABPSolution) -> ALWABPSolution:
     """
-    Busca local trocando trabalhadores com foco na estação crítica (first improvement).
+    Busca local trocando trabalhadores com foco na estação crítica.
+
+    Os m candidatos (trocar a crítica com cada s2) são avaliados de uma
+    vez em NumPy: só os dois totais envolvidos mudam, então basta um
+    gather dos tempos por trabalhador + uma redução por estação para
+    obter o novo C_max de todas as trocas — incapacidade sai de graça
+    (a soma com alguma tarefa impossível dá Inf e elimina o candidato).
+    Com o lote inteiro em mãos, aplica a MELHOR troca (argmin), não a
+    primeira que melhora.
     """
     inst = solution.instance
     m = inst.num_workers
 
     s_current = solution
+    s_current.evaluate()
+
+    if m < 2:
+        return s_current
 
     while True:
-        s_current.evaluate()
         if not s_current.is_feasible:
             return s_current
 
@@ -549,43 +1022,122 @@ def local_search_worker_swap(solution: ALWABPSolution) -> ALWABPSolution:
         if any(t >= INF for t in station_times):
             return s_current
 
-        worst_station = max(range(m), key=lambda s: station_times[s])
-        improved = False
+        task_station = s_current.task_station_assignment
+        worker_station = s_current.worker_station_assignment
+
+        # redução única em C, sem m chamadas do closure por iteração
+        worst_station = int(station_times.argmax())
+
+        tasks_by_station = s_current.tasks_in_station()
+        tasks_worst = tasks_by_station[worst_station]
+        w1 = worker_station[worst_station]
+
+        # Novo tempo da estação crítica com CADA trabalhador (uma soma
+        # das colunas das tarefas críticas por linha da matriz), lido na
+        # ordem dos trabalhadores por estação: new_worst[s2] é o tempo
+        # da crítica após receber o trabalhador de s2
+        sums_by_worker = inst.task_times[:, tasks_worst].sum(axis=1)
+        new_worst = sums_by_worker[worker_station]
+
+        # Novo tempo de cada estação s2 ao receber w1: uma redução por
+        # estação sobre a linha de w1
+        new_s2 = np.bincount(task_station, weights=inst.task_times[w1],
+                             minlength=m)
+
+        # Máximo das estações não envolvidas na troca: sem a crítica,
+        # sobra escolher entre o maior e o segundo maior restantes
+        rest = station_times.copy()
+        rest[worst_station] = -np.inf
+        top1 = int(rest.argmax())
+        rest_max = np.full(m, rest[top1])
+        rest[top1] = -np.inf
+        rest_max[top1] = rest.max()
+
+        # C_max candidato de cada troca; a própria crítica fica fora
+        cand = np.maximum(rest_max, np.maximum(new_worst, new_s2))
+        cand[worst_station] = np.inf
+
+        s2 = int(cand.argmin())
+        new_cmax = float(cand[s2])
+        if not (new_cmax < s_current.cycle_time):
+            break
 
-        # Tenta trocar o trabalhador da estação crítica com outras estações
-        for s2 in range(m):
-            if s2 == worst_station:
-                continue
+        new_times = station_times.copy()
+        new_times[worst_station] = new_worst[s2]
+        new_times[s2] = new_s2[s2]
+
+        new_w = worker_station.copy()
+        new_w[worst_station], new_w[s2] = new_w[s2], new_w[worst_station]
+        # o array de tarefas não muda: compartilhado, assim
+        # como a inversão tarefa->estação
+        s_neighbor = ALWABPSolution(inst, task_station, new_w)
+        s_neighbor.is_feasible = True
+        s_neighbor.station_times = new_times
+        s_neighbor.cycle_time = new_cmax
+        s_neighbor._key = new_cmax
+        s_neighbor._evaluated = True
+        s_neighbor._tasks_in_station = tasks_by_station
+        s_current = s_neighbor
 
-            new_w = list(s_current.worker_station_assignment)
-            new_w[worst_station], new_w[s2] = new_w[s2], new_w[worst_station]
+    return s_current
 
-            # check rápida de incapacidade para todas tarefas
-            feasible_cap = True
-            for i, s in enumerate(s_current.task_station_assignment):
-                w = new_w[s]
-                if inst.task_times[w][i] >= INF:
-                    feasible_cap = False
-                    break
-            if not feasible_cap:
-                continue
 
-            s_neighbor = ALWABPSolution(
-                inst,
-                list(s_current.task_station_assignment),
-                new_w
-            )
-            s_neighbor.evaluate()
+# ------------------------------------------------------
+# API em processo (usada pelos drivers paralelos)
+# ------------------------------------------------------
 
-            if s_neighbor.is_feasible and s_neighbor < s_current:
-                s_current = s_neighbor
-                improved = True
-                break
+def run(instance_text: str = None,
+        seed: int = DEFAULT_SEED,
+        output_path: str = None,
+        max_iter: int = VNS_MAX_ITER,
+        k_max: int = VNS_K_MAX,
+        time_limit: float = None,
+        parsed_instance: 'ALWABPInstance' = None,
+        return_solution: bool = False,
+        target_cmax: float = None):
+    """
+    Executa uma replicação do VNS em processo, sem subprocess: o módulo
+    é importado uma vez por worker e cada replicação é uma chamada de
+    função, amortizando o custo de inicialização do interpretador.
 
-        if not improved:
-            break
+    parsed_instance permite reaproveitar a instância já parseada entre
+    replicações (o VNS não a modifica); caso contrário instance_text é
+    parseado aqui.
 
-    return s_current
+    target_cmax (ótimo/UB conhecido da instância) é repassado ao vns,
+    que encerra a busca assim que o atinge.
+
+    Retorna (SI, SF, tempo_em_segundos) — com return_solution=True,
+    (SI, SF, tempo, texto_da_solução), deixando o caller decidir o que
+    gravar. Se output_path for fornecido, grava a melhor solução
+    completa no arquivo.
+    """
+    # RNG local da replicação: sem tocar o estado global do módulo
+    # random, compartilhado pelas demais replicações do worker
+    rng = random.Random(seed)
+    if parsed_instance is not None:
+        instance = parsed_instance
+    else:
+        instance = ALWABPInstance.from_text(instance_text)
+
+    _warmup_kernel()
+
+    start = time.time()
+    s_initial, s_best = vns(instance, max_iter, k_max,
+                            time_limit=time_limit, rng=rng,
+                            target_cmax=target_cmax)
+    elapsed = time.time() - start
+
+    si = s_initial.cycle_time if s_initial.is_feasible else INF
+    sf = s_best.cycle_time if s_best.is_feasible else INF
+
+    if output_path is not None:
+        with open(output_path, "w") as f:
+            f.write(s_best.to_output_format())
+
+    if return_solution:
+        return si, sf, elapsed, s_best.to_output_format()
+    return si, sf, elapsed
 
 
 def parse_args():
@@ -651,18 +1203,20 @@ def main():
     k_max = args.kmax
     time_limit = args.time_limit
 
-    # Semente da execução
-    if args.seed is not None:
-        random.seed(args.seed)
-    else:
-        random.seed(DEFAULT_SEED)
+    # Semente da execução (RNG local, mesmo fluxo do caminho em processo)
+    seed = args.seed if args.seed is not None else DEFAULT_SEED
+    rng = random.Random(seed)
 
     # Instância (entradas vêm via redirecionamento "<")
     instance = ALWABPInstance.from_stdin()
 
+    # Compila o kernel JIT antes de cronometrar o VNS
+    _warmup_kernel()
+
     # Rodar VNS
     start = time.time()
-    s_initial, s_best = vns(instance, max_iter, k_max, time_limit=time_limit)
+    s_initial, s_best = vns(instance, max_iter, k_max,
+                            time_limit=time_limit, rng=rng)
     end = time.time()
 
     # Saída simplificada (para o script que processa seeds)
@@ -1,181 +1,188 @@
+import io
 import os
 import csv
-import glob
-from collections import defaultdict
+import functools
+
+import pandas as pd
 
 
 def load_instance_files(instances_dir: str):
     """
-    Carrega lista de arquivos de instância.
+    Carrega lista de arquivos de instância (os.scandir aproveita o stat
+    em cache das entradas, sem o stat duplo do glob).
     """
     if not os.path.exists(instances_dir):
         raise FileNotFoundError(f"Diretório não encontrado: {instances_dir}")
-    
-    instance_files = sorted(glob.glob(os.path.join(instances_dir, "*")))
+
+    with os.scandir(instances_dir) as entries:
+        # .npz são os caches binários gravados ao lado das instâncias
+        instance_files = sorted(
+            entry.path for entry in entries
+            if entry.is_file() and not entry.name.endswith(".npz")
+        )
     return instance_files
 
 
+# Mapeamento de nomes completos para abreviações usadas nos arquivos
+_NAME_MAPPING = {
+    "heskia": "hes",
+    "roszieg": "ros",
+    "wee-mag": "wee",
+    "tonge": "ton"
+}
+
+
+@functools.lru_cache(maxsize=4)
+def _load_optimal_values_cached(csv_file: str, mtime: float) -> dict:
+    """Parse propriamente dito, memoizado por (arquivo, mtime)."""
+    optimal_values = {}
+
+    with open(csv_file, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        col = {name: idx for idx, name in enumerate(header)}
+
+        for row in reader:
+            # Obter tipo e número da instância
+            instance_type = row[col['name']].strip()
+            instance_num = row[col['num']].strip()
+
+            # Obter valor ótimo (UB)
+            try:
+                ub_value = float(row[col['UB']].strip())
+            except (ValueError, IndexError):
+                print(f"AVISO: Não foi possível ler UB para {instance_type}_{instance_num}")
+                continue
+
+            # Mapear para o nome do arquivo: numero_abreviacao (ex: 1_hes);
+            # fora do mapeamento, usar os primeiros 3 caracteres
+            abbrev = _NAME_MAPPING.get(instance_type, instance_type[:3])
+            optimal_values[f"{instance_num}_{abbrev}"] = ub_value
+
+    print(f"Carregados {len(optimal_values)} valores ótimos de {csv_file}")
+    return optimal_values
+
+
 def load_optimal_values(csv_file: str) -> dict:
     """
     Carrega os valores ótimos/UB do arquivo CSV.
-    
+
     O arquivo instances.csv tem formato:
     "name","num","tasks","workers","deps","tdeps","ninc","timef","pinc","LB","UB"
-    
+
     Exemplo: "heskia",1 -> corresponde ao arquivo "1_hes.txt"
+
+    O parse é feito uma única vez por (arquivo, mtime); chamadas
+    repetidas devolvem o dicionário já construído.
     """
-    optimal_values = {}
-    
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            # Mapeamento de nomes completos para abreviações usadas nos arquivos
-            name_mapping = {
-                "heskia": "hes",
-                "roszieg": "ros", 
-                "wee-mag": "wee",
-                "tonge": "ton"
-            }
-            
-            for row in reader:
-                # Obter tipo e número da instância
-                instance_type = row['name'].strip()
-                instance_num = row['num'].strip()
-                
-                # Obter valor ótimo (UB)
-                try:
-                    ub_value = float(row['UB'].strip())
-                except (ValueError, KeyError):
-                    print(f"AVISO: Não foi possível ler UB para {instance_type}_{instance_num}")
-                    continue
-                
-                # Mapear para o nome do arquivo
-                if instance_type in name_mapping:
-                    # Formato: numero_abreviacao (ex: 1_hes)
-                    instance_key = f"{instance_num}_{name_mapping[instance_type]}"
-                    optimal_values[instance_key] = ub_value
-                else:
-                    # Se não estiver no mapeamento, usar os primeiros 3 caracteres
-                    instance_key = f"{instance_num}_{instance_type[:3]}"
-                    optimal_values[instance_key] = ub_value
-            
-            print(f"Carregados {len(optimal_values)} valores ótimos de {csv_file}")
-            
+        mtime = os.path.getmtime(csv_file)
+        return _load_optimal_values_cached(csv_file, mtime)
     except FileNotFoundError:
         print(f"AVISO: Arquivo {csv_file} não encontrado.")
     except Exception as e:
         print(f"ERRO ao carregar {csv_file}: {e}")
         import traceback
         traceback.print_exc()
-    
-    return optimal_values
+
+    return {}
 
 
 def write_temp_file(temp_file: str, results: list):
     """
-    Escreve arquivo temporário com resultados brutos.
+    Escreve arquivo temporário com resultados brutos: uma única
+    abertura com buffer largo, em vez de um write pequeno por linha.
     """
     os.makedirs(os.path.dirname(temp_file), exist_ok=True)
-    
-    with open(temp_file, "w") as f:
+
+    with open(temp_file, "w", buffering=1 << 16) as f:
         f.write("Instance;Replication;Seed;SI;SF;Time_s\n")
-        for result_line in results:
-            f.write(result_line + "\n")
+        if results:
+            f.write("\n".join(results) + "\n")
 
 
-def read_temp_file(temp_file: str):
+def results_to_dataframe(results: list) -> pd.DataFrame:
     """
-    Lê arquivo temporário e retorna dados agrupados por instância.
+    Converte as linhas brutas acumuladas em memória no mesmo DataFrame
+    que read_temp_file produziria, sem o roundtrip gravar -> reler.
+    """
+    content = "Instance;Replication;Seed;SI;SF;Time_s\n" \
+        + "".join(line + "\n" for line in results)
+    return pd.read_csv(io.StringIO(content), sep=';', na_values=['ERROR'])
+
+
+def read_temp_file(temp_file: str) -> pd.DataFrame:
+    """
+    Lê arquivo temporário e retorna um DataFrame com uma linha por replicação.
+    Linhas com 'ERROR' viram NaN nas colunas numéricas.
     """
-    instance_data = defaultdict(list)
-    
     try:
-        with open(temp_file, 'r') as f:
-            next(f)  # Pular cabeçalho
-            for line in f:
-                parts = line.strip().split(';')
-                if len(parts) >= 6:
-                    instance_name = parts[0]
-                    instance_data[instance_name].append(parts)
+        return pd.read_csv(temp_file, sep=';', na_values=['ERROR'])
     except FileNotFoundError:
         print(f"ERRO: Arquivo temporário {temp_file} não encontrado.")
-    
-    return instance_data
+        return pd.DataFrame(
+            columns=["Instance", "Replication", "Seed", "SI", "SF", "Time_s"]
+        )
 
 
 def write_summary_file(summary_file: str,
-                       instance_data: dict,
+                       results_df: pd.DataFrame,
                        optimal_values: dict,
                        instance_times: dict | None = None):
     """
     Escreve arquivo consolidado (summary) com melhores resultados por instância.
-    
-    - instance_data: dados brutos (uma linha por replicação).
+
+    - results_df: dados brutos (uma linha por replicação, vindos de read_temp_file).
     - optimal_values: mapa instância -> valor ótimo/UB.
     - instance_times: opcional; mapa instância -> tempo total medido (start → end).
       Se não for fornecido, o tempo total é calculado pela soma dos tempos das replicações.
     """
     os.makedirs(os.path.dirname(summary_file), exist_ok=True)
-    
-    with open(summary_file, "w") as f:
-        f.write("Instance;Best_Seed;SI;SF;SO;Total_Time_s;Improvement_%;Gap_to_Optimal_%\n")
-        
-        for instance_name in sorted(instance_data.keys()):
-            rows = instance_data[instance_name]
-            
-            # Filtrar apenas linhas com valores numéricos válidos
-            valid_rows = []
-            for row in rows:
-                if len(row) >= 6 and row[3] != 'ERROR' and row[4] != 'ERROR' and row[5] != 'ERROR':
-                    try:
-                        si = float(row[3])
-                        sf = float(row[4])
-                        time_val = float(row[5])
-                        seed = int(row[2])
-                        valid_rows.append((seed, si, sf, time_val))
-                    except ValueError:
-                        continue
-            
-            if not valid_rows:
-                f.write(f"{instance_name};NA;NA;NA;NA;NA;NA;NA\n")
-                continue
-            
-            # Tempo total: se vier de instance_times, usa ele;
-            # caso contrário, mantém a soma das replicações (comportamento antigo).
-            if instance_times is not None and instance_name in instance_times:
-                total_time = instance_times[instance_name]
-            else:
-                total_time = sum(row[3] for row in valid_rows)  # row[3] = time_val
-            
-            # Encontrar a melhor seed (menor SF)
-            best_row = min(valid_rows, key=lambda x: x[2])  # Índice 2 = SF
-            best_seed, best_si, best_sf, _ = best_row
-            
-            # Obter valor ótimo (SO)
-            instance_key = instance_name
-            if instance_name.endswith('.txt'):
-                instance_key = instance_name[:-4]
-            
-            optimal_value = optimal_values.get(instance_key)
-            
-            # Calcular melhoria percentual da SF em relação à SI: 100 * (SI - SF) / SI
-            if best_si > 0:
-                improvement_pct = ((best_si - best_sf) / best_si) * 100
-            else:
-                improvement_pct = 0.0
-
-            # Calcular desvio percentual da SF em relação à solução ótima: 100 * (SF - SO) / SO
-            if optimal_value is not None and optimal_value > 0:
-                gap_to_optimal_pct = ((best_sf - optimal_value) / optimal_value) * 100
-                f.write(
-                    f"{instance_name};{best_seed};{best_si};{best_sf};"
-                    f"{optimal_value};{total_time:.2f};"
-                    f"{improvement_pct:.2f};{gap_to_optimal_pct:.2f}\n"
-                )
-            else:
-                f.write(
-                    f"{instance_name};{best_seed};{best_si};{best_sf};"
-                    f"NA;{total_time:.2f};{improvement_pct:.2f};NA\n"
-                )
+
+    instances = pd.Index(sorted(results_df["Instance"].unique()), name="Instance")
+
+    # Agregações sobre um único groupby (o agrupamento é calculado uma
+    # vez e reutilizado): melhor replicação (menor SF) e soma dos
+    # tempos, considerando apenas linhas com valores numéricos válidos.
+    valid = results_df.dropna(subset=["SI", "SF", "Time_s"])
+    grouped = valid.groupby("Instance")
+    best = (valid.loc[grouped["SF"].idxmin()]
+                 .set_index("Instance")
+                 .reindex(instances))
+
+    # Tempo total: se vier de instance_times, usa ele; caso contrário,
+    # mantém a soma das replicações (comportamento antigo).
+    total_time = grouped["Time_s"].sum().reindex(instances)
+    if instance_times is not None:
+        override = pd.Series(instance_times, dtype=float).reindex(instances)
+        total_time = override.where(override.notna(), total_time)
+
+    # Valor ótimo (SO) por instância, removendo o sufixo .txt da chave
+    keys = instances.str.replace(r"\.txt$", "", regex=True)
+    so = pd.Series([optimal_values.get(key) for key in keys],
+                   index=instances, dtype=float)
+
+    si = best["SI"]
+    sf = best["SF"]
+
+    # Melhoria percentual da SF em relação à SI: 100 * (SI - SF) / SI
+    improvement = ((si - sf) / si * 100).where(si > 0, 0.0)
+    # Desvio percentual da SF em relação à solução ótima: 100 * (SF - SO) / SO
+    gap = (sf - so) / so * 100
+
+    has_valid = sf.notna()          # instâncias com alguma replicação válida
+    has_so = has_valid & (so > 0)   # e com valor ótimo conhecido
+
+    # Formatação colunar (NaN vira NA no fim); números seguem o formato
+    # antigo: seed inteira, SI/SF/SO "crus", tempos e percentuais com 2 casas
+    out = pd.DataFrame(index=instances)
+    out["Best_Seed"] = best["Seed"].map(lambda v: str(int(v)), na_action='ignore')
+    out["SI"] = si.map(str, na_action='ignore')
+    out["SF"] = sf.map(str, na_action='ignore')
+    out["SO"] = so.where(has_so).map(str, na_action='ignore')
+    out["Total_Time_s"] = total_time.where(has_valid).map("{:.2f}".format, na_action='ignore')
+    out["Improvement_%"] = improvement.where(has_valid).map("{:.2f}".format, na_action='ignore')
+    out["Gap_to_Optimal_%"] = gap.where(has_so).map("{:.2f}".format, na_action='ignore')
+
+    out.fillna("NA").to_csv(summary_file, sep=';')
 
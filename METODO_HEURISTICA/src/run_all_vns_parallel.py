@@ -1,6 +1,15 @@
 import os
+import sys
 import time
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import atexit
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
 
 from config import (
     SEEDS_PEQ,
@@ -13,8 +22,7 @@ from config import (
 from file_handler import (
     load_instance_files,
     load_optimal_values,
-    write_temp_file,
-    read_temp_file,
+    results_to_dataframe,
     write_summary_file,
 )
 from run_vns import run_single_replication
@@ -26,55 +34,62 @@ VNS_SCRIPT = "alwabp_vns.py"
 OUTPUT_DIR = "../testes_relatorio/vns_resultados_teste_relatorio"
 INSTANCES_CSV = "../instances.csv"  # Arquivo com os valores ótimos/UB
 
-SUMMARY_FILE = os.path.join(OUTPUT_DIR, "../summary_results.csv")
-TEMP_FILE = os.path.join(OUTPUT_DIR, "../temp_results.csv")
-
-
-def run_instance_with_limit(
-    instance_path: str,
-    instance_name: str,
-    num_replications: int,
-    seeds: list,
-    vns_script: str,
-    output_dir: str,
-    max_iter: int,
-    k_max: int,
-    instance_time_limit: float | None,
-):
+# Contexto de multiprocessing fixado: forkserver cria workers baratos
+# sem reimportar tudo (como o spawn faria em macOS/Windows); se não
+# estiver disponível na plataforma (Windows, onde fork também não
+# existe), cai para o contexto padrão dela.
+try:
+    MP_CONTEXT = multiprocessing.get_context("forkserver")
+except ValueError:
+    MP_CONTEXT = multiprocessing.get_context()
+
+# Pool de processos único do módulo: criado sob demanda na primeira
+# chamada e reaproveitado por qualquer lote subsequente, em vez de
+# criar/destruir workers a cada run_experiment_parallel.
+_POOL = None
+
+
+def _worker_init():
     """
-    Roda TODAS as replicações de UMA instância, em série, respeitando
-    um limite de tempo total por instância.
+    Roda uma vez em cada worker do pool: importa o módulo do VNS e
+    dispara a compilação do kernel JIT, para esses custos não serem
+    cobrados da primeira replicação que cair no worker.
     """
-    start_time = time.time()
-    results = []
-
-    for rep in range(num_replications):
-        elapsed = time.time() - start_time
-        if instance_time_limit is not None and elapsed >= instance_time_limit:
-            print(
-                f"\n{instance_name}: limite de tempo por instância atingido "
-                f"({elapsed:.2f}s >= {instance_time_limit:.2f}s). "
-                "Interrompendo replicações."
-            )
-            break
-
-        seed = seeds[rep]
-        line = run_single_replication(
-            instance_path=instance_path,
-            instance_name=instance_name,
-            rep=rep,
-            seed=seed,
-            vns_script=vns_script,
-            output_dir=output_dir,
-            max_iter=max_iter,
-            k_max=k_max,
-        )
-        results.append(line)
+    import alwabp_vns
+    alwabp_vns._warmup_kernel()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(mp_context=MP_CONTEXT,
+                                    initializer=_worker_init)
+        atexit.register(_POOL.shutdown)
+    return _POOL
 
-    total_time = time.time() - start_time
-    print(f"\n{instance_name}: tempo total de execução {total_time:.2f}s.")
 
-    return results, total_time
+def resume_cache_path(output_dir: str, instance_name: str) -> str:
+    """Caminho do cache de retomada com as replicações de uma instância."""
+    return os.path.join(output_dir, f"{instance_name}.replicacoes.csv")
+
+
+def load_resume_cache(output_dir: str, instance_name: str):
+    """
+    Tenta carregar as replicações já computadas de uma execução
+    anterior. Retorna (linhas, tempo_total) ou None se não houver cache
+    utilizável.
+    """
+    cache_path = resume_cache_path(output_dir, instance_name)
+    try:
+        with open(cache_path, "r") as f:
+            header = f.readline().strip()
+            if not header.startswith("#total_time="):
+                return None
+            total_time = float(header.split("=", 1)[1])
+            lines = [line.strip() for line in f if line.strip()]
+        return lines, total_time
+    except (OSError, ValueError):
+        return None
 
 
 def get_seed_pool(instance_name: str) -> list[int]:
@@ -90,90 +105,261 @@ def get_seed_pool(instance_name: str) -> list[int]:
     return SEEDS_PEQ
 
 
-def run_experiment_parallel():
+def run_experiment_parallel(instances_dir: str = INSTANCES_DIR,
+                            output_dir: str = OUTPUT_DIR,
+                            instances_csv: str = INSTANCES_CSV,
+                            max_iter: int = VNS_MAX_ITER,
+                            k_max: int = VNS_K_MAX,
+                            time_limit: float | None = TIME_LIMIT):
     """
-    Executa todas as instâncias em paralelo, mas as replicações de cada
-    instância são executadas em série dentro de um mesmo processo,
-    respeitando um limite de tempo total por instância.
+    Executa o experimento com um pool plano de tarefas (instância,
+    replicação): cada replicação é um futuro independente, então uma
+    instância difícil não prende um core com suas replicações em série
+    enquanto os outros ficam ociosos no fim do lote. O limite de tempo
+    por instância é repartido igualmente entre as replicações.
+
+    Os parâmetros (com defaults do config) evitam cópias do driver para
+    variar diretórios ou os limites do experimento.
     """
+    summary_file = os.path.join(output_dir, "../summary_results.csv")
+
+    # Pasta de saída criada uma única vez, antes dos workers
+    os.makedirs(output_dir, exist_ok=True)
+
     # Carregar valores ótimos
-    print(f"Carregando valores ótimos de {INSTANCES_CSV}...")
-    optimal_values = load_optimal_values(INSTANCES_CSV)
-    
+    print(f"Carregando valores ótimos de {instances_csv}...")
+    optimal_values = load_optimal_values(instances_csv)
+
     # Listar instâncias
-    print(f"Carregando instâncias de {INSTANCES_DIR}...")
-    instance_files = load_instance_files(INSTANCES_DIR)
+    print(f"Carregando instâncias de {instances_dir}...")
+    instance_files = load_instance_files(instances_dir)
     total_instances = len(instance_files)
 
     print(f"Iniciando experimentos: {total_instances} instâncias.")
-    print(f"Limite de tempo por instância: {TIME_LIMIT if TIME_LIMIT is not None else 'sem limite'} s")
-    print(f"Arquivo temporário: {TEMP_FILE}")
-    print(f"Arquivo final: {SUMMARY_FILE}")
+    print(f"Limite de tempo por instância: {time_limit if time_limit is not None else 'sem limite'} s")
+    print(f"Arquivo final: {summary_file}")
 
     all_results = []
     instance_times: dict[str, float] = {}
 
-    # Cada futuro agora corresponde a UMA instância
-    with ProcessPoolExecutor() as executor:
-        futures = {}
-
-        for instance_path in instance_files:
-            instance_name = os.path.basename(instance_path)
-
-            # escolhe o pool de seeds conforme a família da instância
-            seed_pool = get_seed_pool(instance_name)
-
-            future = executor.submit(
-                run_instance_with_limit,
-                instance_path,
-                instance_name,
-                len(seed_pool),   # número de replicações = qtd de seeds
-                seed_pool,        # lista de seeds daquela instância
-                VNS_SCRIPT,
-                OUTPUT_DIR,
-                VNS_MAX_ITER,
-                VNS_K_MAX,
-                TIME_LIMIT,       # limite de tempo POR instância
-            )
+    # Retomada: instâncias com cache de execução anterior não são
+    # resubmetidas; suas linhas entram direto no consolidado
+    pending_files = []
+    for instance_path in instance_files:
+        instance_name = os.path.basename(instance_path)
+        cached = load_resume_cache(output_dir, instance_name)
+        if cached is not None:
+            lines, total_time = cached
+            all_results.extend(lines)
+            instance_times[instance_name] = total_time
+        else:
+            pending_files.append(instance_path)
+
+    retomadas = total_instances - len(pending_files)
+    if retomadas:
+        print(f"{retomadas} instâncias retomadas de execução anterior.")
 
-            futures[future] = instance_name
+    # LPT (Longest Processing Time first): instâncias maiores — proxy
+    # barato: tamanho do arquivo — são submetidas primeiro, para as
+    # mais lentas não ficarem por último inflando o makespan do lote
+    instance_files = sorted(pending_files, key=os.path.getsize, reverse=True)
+    total_instances = len(instance_files)
 
-        print("\nProgresso:")
+    # Pool plano de tarefas (instância, replicação) + estado por
+    # instância para agregar as linhas, eleger a melhor solução e
+    # escrever o cache de retomada quando a última replicação termina
+    states: dict = {}
+    tasks = []
+    for instance_path in instance_files:
+        instance_name = os.path.basename(instance_path)
 
-        # i vai de 1 até total_instances
-        for i, future in enumerate(as_completed(futures), start=1):
-            instance_name = futures[future]
-            instance_results, total_time = future.result()  # lista de linhas + tempo total
-            all_results.extend(instance_results)
-            instance_times[instance_name] = total_time
+        # escolhe o pool de seeds conforme a família da instância
+        seed_pool = get_seed_pool(instance_name)
+        num_reps = len(seed_pool)
+        rep_limit = time_limit / num_reps if time_limit is not None else None
+
+        # Ótimo conhecido da instância: o VNS para ao atingi-lo, em vez
+        # de queimar as iterações restantes sem ter como melhorar
+        target_cmax = optimal_values.get(instance_name.removesuffix(".txt"))
 
-            pct = (i / total_instances) * 100
-            print(
-                f"  -> {i}/{total_instances} instâncias concluídas ({pct:.2f}%)",
-                end="\r",
-                flush=True
+        states[instance_name] = {
+            "pendentes": num_reps,
+            "linhas": [None] * num_reps,
+            "melhor_sf": float('inf'),
+            "melhor_saida": None,  # (caminho, texto)
+            "tempo": 0.0,
+        }
+        for rep in range(num_reps):
+            tasks.append(
+                (instance_path, instance_name, rep, seed_pool[rep],
+                 rep_limit, target_cmax)
             )
 
+    # O pool é o singleton do módulo, reaproveitado entre chamadas
+    # consecutivas.
+    executor = get_pool()
+
+    # Submissão em janela limitada: no máximo 2x o número de workers de
+    # futuros pendentes, em vez de materializar todos de uma vez.
+    window = 2 * (os.cpu_count() or 1)
+    pending: dict = {}
+    task_iter = iter(tasks)
+
+    def submit_next():
+        task = next(task_iter, None)
+        if task is None:
+            return
+
+        instance_path, instance_name, rep, seed, rep_limit, target_cmax = task
+        future = executor.submit(
+            run_single_replication,
+            instance_path,
+            instance_name,
+            rep,
+            seed,
+            VNS_SCRIPT,
+            output_dir,
+            max_iter=max_iter,
+            k_max=k_max,
+            time_limit=rep_limit,
+            collect_solution=True,
+            target_cmax=target_cmax,
+        )
+        pending[future] = (instance_name, rep)
+
+    for _ in range(min(window, len(tasks))):
+        submit_next()
+
+    print("\nProgresso:")
+
+    # Barra de progresso: tqdm agrupa os refreshes internamente e fica
+    # muda quando o stdout não é um TTY (logs de cluster sem spam de \r);
+    # sem tqdm instalado, cai na impressão acelerada a ~10/s.
+    bar = None
+    if tqdm is not None:
+        bar = tqdm(total=total_instances, unit="inst",
+                   disable=not sys.stdout.isatty())
+
+    concluidas = 0
+    last_print = 0.0
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            instance_name, rep = pending.pop(future)
+            line, sf, output_filename, solution_text = future.result()
+            submit_next()
+
+            state = states[instance_name]
+            state["pendentes"] -= 1
+            state["linhas"][rep] = line
+            try:
+                state["tempo"] += float(line.rsplit(";", 1)[1])
+            except ValueError:
+                pass  # replicação com ERROR não soma tempo
+            if solution_text is not None and sf < state["melhor_sf"]:
+                state["melhor_sf"] = sf
+                state["melhor_saida"] = (output_filename, solution_text)
+
+            if state["pendentes"] > 0:
+                continue
+
+            # Última replicação da instância: consolida as linhas,
+            # grava só a melhor solução e o cache de retomada — dois
+            # arquivos por instância no total, em vez de um .txt por
+            # replicação (o custo de metadados do filesystem dominava
+            # com centenas de arquivos pequenos)
+            lines = [ln for ln in state["linhas"] if ln is not None]
+            all_results.extend(lines)
+            instance_times[instance_name] = state["tempo"]
+
+            if state["melhor_saida"] is not None:
+                best_filename, best_text = state["melhor_saida"]
+                with open(best_filename, "w") as f:
+                    f.write(best_text)
+
+            with open(resume_cache_path(output_dir, instance_name), "w") as f:
+                f.write(f"#total_time={state['tempo']:.4f}\n")
+                f.writelines(ln + "\n" for ln in lines)
+
+            concluidas += 1
+
+            if bar is not None:
+                bar.update(1)
+                continue
+
+            # Atualização de progresso limitada a ~10/s (a última
+            # conclusão sempre é impressa)
+            now = time.monotonic()
+            if now - last_print > 0.1 or concluidas == total_instances:
+                pct = (concluidas / total_instances) * 100
+                print(
+                    f"  -> {concluidas}/{total_instances} instâncias concluídas ({pct:.2f}%)",
+                    end="\r",
+                    flush=True
+                )
+                last_print = now
+
+    if bar is not None:
+        bar.close()
+
     print(f"\n\nTodas as {total_instances} instâncias concluídas (ou interrompidas por tempo).")
-    
-    # Salvar resultados temporários
-    print(f"Salvando resultados temporários em {TEMP_FILE}...")
-    write_temp_file(TEMP_FILE, all_results)
-    
-    # Consolidar resultados
+
+    # Consolidar resultados direto da memória, sem o roundtrip de
+    # gravar e reler o temp_results.csv (que era removido no fim)
     print("Consolidando resultados por instância...")
-    instance_data = read_temp_file(TEMP_FILE)
-    write_summary_file(SUMMARY_FILE, instance_data, optimal_values, instance_times)
-    
-    print(f"Arquivo final salvo em: {SUMMARY_FILE}")
-    
-    # Remover arquivo temporário (opcional)
-    try:
-        os.remove(TEMP_FILE)
-        print(f"Arquivo temporário {TEMP_FILE} removido.")
-    except OSError:
-        pass
+    results_df = results_to_dataframe(all_results)
+    write_summary_file(summary_file, results_df, optimal_values, instance_times)
+
+    print(f"Arquivo final salvo em: {summary_file}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Roda o experimento VNS completo em paralelo."
+    )
+    parser.add_argument(
+        "--instances-dir",
+        default=INSTANCES_DIR,
+        help=f"Pasta com as instâncias (default: {INSTANCES_DIR}).",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=OUTPUT_DIR,
+        help=f"Pasta para as soluções completas (default: {OUTPUT_DIR}).",
+    )
+    parser.add_argument(
+        "--instances-csv",
+        default=INSTANCES_CSV,
+        help=f"CSV com os valores ótimos/UB (default: {INSTANCES_CSV}).",
+    )
+    parser.add_argument(
+        "--max-iter",
+        type=int,
+        default=VNS_MAX_ITER,
+        help=f"Número máximo de iterações do VNS (default: {VNS_MAX_ITER}).",
+    )
+    parser.add_argument(
+        "--kmax",
+        type=int,
+        default=VNS_K_MAX,
+        help=f"Valor máximo de k do VNS (default: {VNS_K_MAX}).",
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=TIME_LIMIT,
+        help=f"Limite de tempo por instância em segundos (default: {TIME_LIMIT}).",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    run_experiment_parallel()
+    args = parse_args()
+    run_experiment_parallel(
+        instances_dir=args.instances_dir,
+        output_dir=args.output_dir,
+        instances_csv=args.instances_csv,
+        max_iter=args.max_iter,
+        k_max=args.kmax,
+        time_limit=args.time_limit,
+    )
@@ -1,7 +1,70 @@
 import os
+import sys
+import signal
 import subprocess
 from typing import Optional
 
+import numpy as np
+
+import alwabp_vns
+
+
+# Cache por processo de instâncias parseadas, chaveado por (caminho,
+# mtime): com o pool plano, replicações da mesma instância caem em
+# workers que já a parsearam e reaproveitam o objeto (o VNS não o
+# modifica). O parse de cada instância acontece no máximo uma vez por
+# worker — e como o driver submete como (caminho, seed), nada é
+# picklado além de strings e números. Limitado para não reter
+# instâncias grandes sem uso.
+_PARSED_CACHE_MAX = 8
+_parsed_cache: dict = {}
+
+
+def _load_instance_binary(instance_path: str, mtime: float):
+    """
+    Parse com cache binário em disco: na primeira leitura a instância é
+    gravada como <instancia>.npz ao lado do arquivo texto; reexecuções
+    reconstroem os arrays com np.load, sem reconverter n*k floats ASCII.
+    Cache obsoleto (mais antigo que a instância) ou ilegível é
+    reparseado; falha ao gravar (diretório somente leitura) é ignorada.
+    """
+    npz_path = instance_path + ".npz"
+    try:
+        if os.path.getmtime(npz_path) >= mtime:
+            data = np.load(npz_path)
+            task_times = data["task_times"]
+            precedences = [(int(i), int(j)) for i, j in data["precedences"]]
+            return alwabp_vns.ALWABPInstance(
+                task_times.shape[1], task_times.shape[0],
+                task_times, precedences
+            )
+    except (OSError, KeyError, ValueError):
+        pass
+
+    instance = alwabp_vns.ALWABPInstance.from_file(instance_path)
+    try:
+        np.savez(
+            npz_path,
+            task_times=instance.task_times,
+            precedences=np.asarray(instance.precedences,
+                                   dtype=np.int32).reshape(-1, 2),
+        )
+    except OSError:
+        pass
+    return instance
+
+
+def _load_parsed_instance(instance_path: str):
+    mtime = os.path.getmtime(instance_path)
+    key = (instance_path, mtime)
+    instance = _parsed_cache.get(key)
+    if instance is None:
+        instance = _load_instance_binary(instance_path, mtime)
+        _parsed_cache[key] = instance
+        if len(_parsed_cache) > _PARSED_CACHE_MAX:
+            _parsed_cache.pop(next(iter(_parsed_cache)))
+    return instance
+
 
 def run_single_replication(instance_path: str,
                            instance_name: str,
@@ -10,48 +73,172 @@ def run_single_replication(instance_path: str,
                            vns_script: str,
                            output_dir: str,
                            max_iter: Optional[int] = None,
-                           k_max: Optional[int] = None) -> str:
+                           k_max: Optional[int] = None,
+                           time_limit: Optional[float] = None,
+                           parsed_instance=None,
+                           collect_solution: bool = False,
+                           target_cmax: Optional[float] = None):
+    """
+    Executa 1 replicação do VNS em processo (alwabp_vns.run), sem pagar
+    startup de interpretador + reimport por replicação.
+
+    parsed_instance (ALWABPInstance já parseada) pula até o cache do
+    processo; sem ele, a instância vem do cache por (caminho, mtime)
+    deste módulo. vns_script é mantido na assinatura por
+    compatibilidade com os drivers; só é usado no caminho subprocess de
+    fallback.
+
+    target_cmax (ótimo/UB conhecido da instância) faz o VNS parar assim
+    que o atinge, sem queimar as iterações restantes.
+
+    Retorna:
+        "instancia;rep;seed;SI;SF;tempo"
+
+    Com collect_solution=True, nada é gravado em disco aqui; retorna
+    (linha, SF, caminho_de_saida, texto_da_solução) para o caller
+    decidir qual replicação merece o arquivo.
+
+    A pasta de saída deve existir (o driver a cria uma única vez antes
+    de submeter as tarefas; aqui seria um stat por replicação).
+    """
+    # Arquivo onde a solução completa será salva
+    output_filename = os.path.join(
+        output_dir, f"{instance_name}_rep{rep+1}_seed{seed}.txt"
+    )
+
+    try:
+        if parsed_instance is None:
+            parsed_instance = _load_parsed_instance(instance_path)
+
+        kwargs = {}
+        if max_iter is not None:
+            kwargs["max_iter"] = max_iter
+        if k_max is not None:
+            kwargs["k_max"] = k_max
+        if time_limit is not None:
+            kwargs["time_limit"] = time_limit
+        if target_cmax is not None:
+            kwargs["target_cmax"] = target_cmax
+
+        if collect_solution:
+            si, sf, elapsed, solution_text = alwabp_vns.run(
+                None, seed, None,
+                parsed_instance=parsed_instance,
+                return_solution=True, **kwargs
+            )
+            line = f"{instance_name};{rep+1};{seed};{si};{sf};{elapsed:.4f}"
+            return line, sf, output_filename, solution_text
+
+        si, sf, elapsed = alwabp_vns.run(
+            None, seed, output_filename,
+            parsed_instance=parsed_instance, **kwargs
+        )
+        return f"{instance_name};{rep+1};{seed};{si};{sf};{elapsed:.4f}"
+
+    except Exception as e:
+        print(f"\n{instance_name} - Rep {rep+1} Seed {seed}: ERRO — {e}")
+        error_line = f"{instance_name};{rep+1};{seed};ERROR;ERROR;ERROR"
+        if collect_solution:
+            return error_line, float('inf'), output_filename, None
+        return error_line
+
+
+def run_single_replication_subprocess(instance_path: str,
+                                      instance_name: str,
+                                      rep: int,
+                                      seed: int,
+                                      vns_script: str,
+                                      output_dir: str,
+                                      max_iter: Optional[int] = None,
+                                      k_max: Optional[int] = None,
+                                      time_limit: Optional[float] = None) -> str:
     """
-    Executa 1 replicação do VNS para uma instância.
+    Caminho antigo via subprocess, mantido como fallback para rodar o
+    VNS isolado em outro interpretador (ex.: depuração de crash).
+
+    time_limit (segundos) limita a replicação: estourado o prazo, o
+    grupo de processos do filho inteiro é morto (SIGKILL no pgid, para
+    não deixar órfãos segurando o orçamento da instância) e a linha sai
+    como ERROR.
 
     Retorna:
         "instancia;rep;seed;SI;SF;tempo"
     """
-    # Garante pasta de saída
     if not os.path.exists(output_dir):
         os.makedirs(output_dir, exist_ok=True)
 
-    # Arquivo onde a solução completa será salva
     output_filename = os.path.join(
         output_dir, f"{instance_name}_rep{rep+1}_seed{seed}.txt"
     )
 
-    # Monta comando base
-    base_cmd = f"python {vns_script} {output_filename} {seed}"
+    # Monta o comando como lista de argumentos: sem shell intermediário
+    # (um fork+exec a menos por replicação) e sem resolução de PATH
+    # graças ao sys.executable
+    cmd = [sys.executable, vns_script, output_filename, str(seed)]
     if max_iter is not None:
-        base_cmd += f" --max-iter {max_iter}"
+        cmd += ["--max-iter", str(max_iter)]
     if k_max is not None:
-        base_cmd += f" --kmax {k_max}"
-
-    # Redireciona a instância via stdin
-    command = f"{base_cmd} < {instance_path}"
+        cmd += ["--kmax", str(k_max)]
 
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True,
-        )
+        # A instância continua entrando via stdin, agora com o arquivo
+        # aberto no pai no lugar do redirecionamento do shell. O stdout
+        # do filho é consumido em streaming, guardando só a última linha
+        # (o resumo SI;SF;tempo), sem acumular todo o log em memória.
+        # Sem .pyc no primeiro launch e sem buffer de linha no pipe;
+        # corta alguns ms do startup de cada interpretador filho
+        env = {
+            **os.environ,
+            "PYTHONDONTWRITEBYTECODE": "1",
+            "PYTHONUNBUFFERED": "1",
+        }
 
-        summary_line = result.stdout.strip()
-        return f"{instance_name};{rep+1};{seed};{summary_line}"
+        with open(instance_path, "rb") as instance_f:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=instance_f,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env=env,
+                start_new_session=True,
+            )
+            if time_limit is not None:
+                # communicate com prazo: replicação pendurada não segura
+                # o orçamento da instância; o filho vira líder de sessão
+                # (start_new_session), então o SIGKILL no grupo derruba
+                # também qualquer neto que ele tenha criado
+                try:
+                    stdout_text, stderr_text = proc.communicate(
+                        timeout=time_limit
+                    )
+                except subprocess.TimeoutExpired:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                    proc.wait()
+                    print(f"\n{instance_name} - Rep {rep+1} Seed {seed}: "
+                          f"TIMEOUT após {time_limit:.0f}s")
+                    return f"{instance_name};{rep+1};{seed};ERROR;ERROR;ERROR"
+                summary_line = ""
+                for line in stdout_text.splitlines():
+                    line = line.strip()
+                    if line:
+                        summary_line = line
+                returncode = proc.returncode
+            else:
+                summary_line = ""
+                for line in proc.stdout:
+                    line = line.strip()
+                    if line:
+                        summary_line = line
+                stderr_text = proc.stderr.read()
+                returncode = proc.wait()
 
-    except subprocess.CalledProcessError as e:
-        msg = e.stderr.strip()
-        print(f"\n{instance_name} - Rep {rep+1} Seed {seed}: ERRO — {msg}")
-        return f"{instance_name};{rep+1};{seed};ERROR;ERROR;ERROR"
+        if returncode != 0:
+            msg = stderr_text.strip()
+            print(f"\n{instance_name} - Rep {rep+1} Seed {seed}: ERRO — {msg}")
+            return f"{instance_name};{rep+1};{seed};ERROR;ERROR;ERROR"
+
+        return f"{instance_name};{rep+1};{seed};{summary_line}"
 
     except Exception as e:
         print(f"\n{instance_name} - Rep {rep+1} Seed {seed}: ERRO — {e}")
@@ -1,8 +1,43 @@
 import os
-import csv
 import re
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import pandas as pd
+
+# Motor de regex opcional: com o pacote google-re2 instalado, os
+# padrões simples rodam no RE2 (DFA, custo por byte menor e sem
+# backtracking); sem ele, fica o re da stdlib. O padrão combinado
+# abaixo continua no re de qualquer forma — o despacho por lastgroup e
+# o finditer com offset dependem da API completa da stdlib.
+try:
+    import re2 as _re_engine
+except ImportError:
+    _re_engine = re
+
+# Padrão combinado compilado uma vez no import: uma única varredura do
+# arquivo encontra os três campos (em vez de três re.search, cada um
+# recomeçando do byte zero), e pattern.finditer pula o lookup do cache
+# interno do re a cada arquivo processado. O padrão é bytes — os
+# números extraídos são ASCII puro, então o regex roda direto sobre o
+# conteúdo lido, sem decodificar o arquivo; o encode cobre o "ç"/"ã"
+# do rótulo "execução" (os arquivos são UTF-8)
+_ALL_RE = re.compile(
+    (r'Valor objetivo:\s*(?P<valor>[0-9]+(?:\.[0-9]+)?)'
+     r'|Tempo de execução:\s*(?P<tempo>[0-9]+(?:\.[0-9]+)?)'
+     r'|Gap:\s*(?P<gap>[0-9]+(?:\.[0-9]+)?)%').encode('utf-8')
+)
+
+# Nome dos arquivos de resultado: resultado_<instancia>.txt
+_FNAME_RE = _re_engine.compile(r'resultado_(.+)\.txt')
+
+# Cache em disco dos resultados já parseados, gravado ao lado dos .txt
+# e chaveado por (nome, mtime_ns, tamanho): reexecuções só reparsem
+# arquivos cujo stat mudou — mesmo padrão do cache .npz das instâncias
+_GUROBI_CACHE_NAME = 'gurobi_cache.pkl'
+
+
 def extract_gurobi_data(txt_file_path):
     """
     Extrai dados do arquivo de resultado do Gurobi.
@@ -10,27 +45,40 @@ def extract_gurobi_data(txt_file_path):
     Retorna: (valor_objetivo, tempo_execucao, gap) ou (None, None, None) se não encontrar.
     """
     try:
-        with open(txt_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Arquivo inteiro lido em binário de uma vez (read_bytes faz
+        # open/read/close dimensionado pelo stat, sem a camada de texto
+        # decodificando incrementalmente); o float() do Python 3 aceita
+        # os bytes capturados direto
+        content = Path(txt_file_path).read_bytes()
         
         valor_objetivo = None
         tempo_execucao = None
         gap = None
         
-        # Extrair Valor Objetivo
-        valor_match = re.search(r'Valor objetivo:\s*([0-9]+(?:\.[0-9]+)?)', content)
-        if valor_match:
-            valor_objetivo = float(valor_match.group(1))
-        
-        # Extrair Tempo de Execução
-        tempo_match = re.search(r'Tempo de execução:\s*([0-9]+(?:\.[0-9]+)?)', content)
-        if tempo_match:
-            tempo_execucao = float(tempo_match.group(1))
-        
-        # Extrair Gap
-        gap_match = re.search(r'Gap:\s*([0-9]+(?:\.[0-9]+)?)%', content)
-        if gap_match:
-            gap = float(gap_match.group(1))
+        # Pré-filtro barato: find em C localiza o primeiro rótulo (nos
+        # resultados do Gurobi, "Valor objetivo" vem antes de "Gap" e
+        # "Tempo"), e o motor de regex parte dali em vez de mastigar o
+        # preâmbulo do log; sem o rótulo, volta ao início por segurança
+        start = content.find(b'Valor objetivo:')
+        if start < 0:
+            start = 0
+
+        # Uma passada só: o primeiro match de cada campo vale, e a
+        # varredura para assim que os três estão preenchidos
+        for m in _ALL_RE.finditer(content, start):
+            g = m.lastgroup
+            if g == 'valor':
+                if valor_objetivo is None:
+                    valor_objetivo = float(m.group('valor'))
+            elif g == 'tempo':
+                if tempo_execucao is None:
+                    tempo_execucao = float(m.group('tempo'))
+            elif gap is None:
+                gap = float(m.group('gap'))
+
+            if (valor_objetivo is not None and tempo_execucao is not None
+                    and gap is not None):
+                break
         
         return valor_objetivo, tempo_execucao, gap
     
@@ -48,32 +96,81 @@ def process_gurobi_results(gurobi_dir, instance_names):
     Retorna um dicionário: {nome_instancia: (valor_objetivo, tempo_execucao, gap)}
     """
     gurobi_data = {}
-    
-    # Listar todos os arquivos .txt no diretório
-    for txt_file in os.listdir(gurobi_dir):
-        if txt_file.endswith('.txt') and txt_file.startswith('resultado_'):
-            # Extrair nome da instância (remover "resultado_" e ".txt")
-            instance_name = txt_file[10:-4]  # Remove "resultado_" (10 chars) e ".txt" (4 chars)
-            
+
+    cache_path = os.path.join(gurobi_dir, _GUROBI_CACHE_NAME)
+    try:
+        with open(cache_path, 'rb') as f:
+            cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        cache = {}
+    new_cache = {}
+
+    # Enumerar os .txt do diretório com scandir: entradas vêm sob
+    # demanda com nome, caminho e stat prontos, sem a lista
+    # intermediária do listdir nem os os.path.join por arquivo
+    pairs = []
+    with os.scandir(gurobi_dir) as entries:
+        for entry in entries:
+            # Filtrar e extrair o nome da instância num passo só:
+            # fullmatch do padrão compilado em vez de
+            # startswith/endswith + fatia com offsets mágicos
+            m = _FNAME_RE.fullmatch(entry.name)
+            if m is None:
+                continue
+
             # Verificar se esta instância está na lista que temos
-            if instance_name in instance_names:
-                txt_path = os.path.join(gurobi_dir, txt_file)
-                valor, tempo, gap = extract_gurobi_data(txt_path)
-                
-                if valor is not None:
-                    gurobi_data[instance_name] = {
-                        'sol_gurobi': valor,
-                        'time_gurobi': tempo,
-                        'gap_gurobi': gap
-                    }
-                else:
-                    print(f"AVISO: Não foi possível extrair dados de {txt_file}")
-                    gurobi_data[instance_name] = {
-                        'sol_gurobi': None,
-                        'time_gurobi': None,
-                        'gap_gurobi': None
-                    }
-    
+            instance_name = m.group(1)
+            if instance_name not in instance_names:
+                continue
+
+            st = entry.stat()
+            key = (entry.name, st.st_mtime_ns, st.st_size)
+            hit = cache.get(key)
+            if hit is not None:
+                gurobi_data[instance_name] = hit
+                new_cache[key] = hit
+            else:
+                pairs.append((instance_name, entry.path, key))
+
+    if not pairs:
+        return gurobi_data
+
+    # Cada arquivo é independente (abrir + ler + regex): o parse é
+    # despachado para um pool de threads — o custo aqui é dominado por
+    # I/O, e threads não pagam o fork/pickle de um pool de processos
+    with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1,
+                                            len(pairs))) as executor:
+        results = executor.map(extract_gurobi_data,
+                               [path for _, path, _ in pairs])
+
+    for (instance_name, path, key), (valor, tempo, gap) in zip(pairs, results):
+        if valor is not None:
+            gurobi_data[instance_name] = {
+                'sol_gurobi': valor,
+                'time_gurobi': tempo,
+                'gap_gurobi': gap
+            }
+            # só parses bem-sucedidos entram no cache: falha (arquivo
+            # truncado etc.) continua sendo reparseada — e avisada — na
+            # próxima execução
+            new_cache[key] = gurobi_data[instance_name]
+        else:
+            print(f"AVISO: Não foi possível extrair dados de {os.path.basename(path)}")
+            gurobi_data[instance_name] = {
+                'sol_gurobi': None,
+                'time_gurobi': None,
+                'gap_gurobi': None
+            }
+
+    # Regrava o cache (entradas obsoletas ficam de fora); falha ao
+    # gravar (diretório somente leitura) é ignorada
+    if new_cache != cache:
+        try:
+            with open(cache_path, 'wb') as f:
+                pickle.dump(new_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+
     return gurobi_data
 
 def generate_final_csv(summary_csv_path, gurobi_dir, output_csv_path):
@@ -82,15 +179,15 @@ def generate_final_csv(summary_csv_path, gurobi_dir, output_csv_path):
     A ordem final das colunas é:
     Instance;Best_Seed;SI;SF;SO;SOL_GUROBI;TIME_GUROBI;GAP_GUROBI_OPT;Total_Time_s;Improvement_% ;Gap_to_Optimal_%
     """
-    vns_data = []
-    instance_names = set()
-    
-    # Ler summary_results.csv gerado pela heurística
-    with open(summary_csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter=';')
-        for row in reader:
-            vns_data.append(row)
-            instance_names.add(row['Instance'].strip())
+    # Ler summary_results.csv gerado pela heurística com o parser C do
+    # pandas: colunas tipadas de uma vez, sem um dict por linha
+    vns_df = pd.read_csv(summary_csv_path, sep=';', dtype=str).fillna('NA')
+    # Instance normalizada uma única vez na coluna; filtro e merge
+    # reusam as mesmas strings em vez de refazer o strip
+    vns_df['Instance'] = vns_df['Instance'].str.strip()
+    # frozenset: só vai servir de filtro de pertinência no scandir, que
+    # assim descarta resultados irrelevantes antes de qualquer open
+    instance_names = frozenset(vns_df['Instance'])
     
     # Processar resultados do Gurobi
     gurobi_data = process_gurobi_results(gurobi_dir, instance_names)
@@ -110,42 +207,35 @@ def generate_final_csv(summary_csv_path, gurobi_dir, output_csv_path):
         'Gap_to_Optimal_%'  # Gap da melhor heurística em relação ao ótimo
     ]
     
-    # Escrever o CSV final com a nova ordem de colunas
-    with open(output_csv_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=final_fieldnames, delimiter=';')
-        writer.writeheader()
-        
-        for row in vns_data:
-            instance_name = row['Instance'].strip()
-            
-            # Montar linha na ordem correta e preencher valores ausentes com 'NA'
-            new_row = {
-                'Instance': instance_name,
-                'Best_Seed': row.get('Best_Seed', 'NA'),
-                'SI': row.get('SI', 'NA'),
-                'SF': row.get('SF', 'NA'),
-                'SO': row.get('SO', 'NA'),
-                'SOL_GUROBI': 'NA',
-                'TIME_GUROBI': 'NA',
-                'GAP_GUROBI_OPT': 'NA',
-                'Total_Time_s': row.get('Total_Time_s', 'NA'),
-                'Improvement_%': row.get('Improvement_%', 'NA'),
-                'Gap_to_Optimal_%': row.get('Gap_to_Optimal_%', 'NA')
-            }
-            
-            # Sobrescrever valores do Gurobi se existirem
-            if instance_name in gurobi_data:
-                gdata = gurobi_data[instance_name]
-                if gdata['sol_gurobi'] is not None:
-                    new_row['SOL_GUROBI'] = gdata['sol_gurobi']
-                if gdata['time_gurobi'] is not None:
-                    new_row['TIME_GUROBI'] = gdata['time_gurobi']
-                if gdata['gap_gurobi'] is not None:
-                    new_row['GAP_GUROBI_OPT'] = gdata['gap_gurobi']
-            
-            writer.writerow(new_row)
-    
+    # Juntar VNS e Gurobi com um merge vetorizado (hash join em C), em
+    # vez de sondar o dicionário e montar um dict por linha em Python
+    gur_df = pd.DataFrame.from_dict(gurobi_data, orient='index')
+    if gur_df.empty:
+        gur_df = pd.DataFrame(
+            columns=['sol_gurobi', 'time_gurobi', 'gap_gurobi']
+        )
+    gur_df = (gur_df
+              .rename(columns={'sol_gurobi': 'SOL_GUROBI',
+                               'time_gurobi': 'TIME_GUROBI',
+                               'gap_gurobi': 'GAP_GUROBI_OPT'})
+              .reset_index()
+              .rename(columns={'index': 'Instance'}))
+
+    merged = (vns_df.merge(gur_df, on='Instance', how='left',
+                           validate='one_to_one')
+                    .reindex(columns=final_fieldnames))
+
+    # Escrever o CSV final com a nova ordem de colunas: to_csv formata
+    # e grava pelo caminho em C do pandas, sem os lookups por campo do
+    # DictWriter em cada linha. na_rep cobre os ausentes (colunas
+    # faltantes ou instâncias sem Gurobi) direto na escrita, sem uma
+    # passada extra materializando 'NA' no DataFrame; lineterminator
+    # fixa \n independente da plataforma
+    merged.to_csv(output_csv_path, sep=';', index=False, encoding='utf-8',
+                  na_rep='NA', lineterminator='\n')
+
     print(f"CSV final gerado: {output_csv_path}")
+    return merged
 
 
 def main():
@@ -171,86 +261,59 @@ def main():
         return
     
     # Gerar CSV final
-    generate_final_csv(summary_csv_path, gurobi_dir, output_csv_path)
-    
+    final_df = generate_final_csv(summary_csv_path, gurobi_dir, output_csv_path)
+
     # Mostrar estatísticas
     print("\n" + "="*60)
     print("RESUMO DA GERAÇÃO DO CSV FINAL")
     print("="*60)
-    
-    # Contar dados disponíveis
-    with open(output_csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter=';')
-        rows = list(reader)
-        
-        total_instances = len(rows)
-        gurobi_solutions = sum(1 for row in rows if row['SOL_GUROBI'] != 'NA')
-        optimal_matches = sum(
-            1
-            for row in rows
-            if row['SOL_GUROBI'] != 'NA'
-            and row['SO'] != 'NA'
-            and float(row['SOL_GUROBI']) == float(row['SO'])
-        )
-        
-        print(f"Total de instâncias: {total_instances}")
-        print(f"Instâncias com solução Gurobi: {gurobi_solutions}")
-        print(f"Instâncias onde Gurobi alcançou o ótimo: {optimal_matches}")
-        
-        # Estatísticas de tempo do Gurobi
-        if gurobi_solutions > 0:
-            times = []
-            for row in rows:
-                if row['TIME_GUROBI'] != 'NA':
-                    try:
-                        times.append(float(row['TIME_GUROBI']))
-                    except ValueError:
-                        pass
-            
-            if times:
-                print(f"\nEstatísticas de tempo do Gurobi:")
-                print(f"  Tempo médio: {sum(times)/len(times):.2f} segundos")
-                print(f"  Tempo mínimo: {min(times):.2f} segundos")
-                print(f"  Tempo máximo: {max(times):.2f} segundos")
-                print(f"  Tempo total: {sum(times):.2f} segundos")
-
-        # Estatísticas da heurística (VNS)
-        vns_times = []
-        heur_optimal_matches = 0
-
-        for row in rows:
-            sf = row.get('SF', 'NA')
-            so = row.get('SO', 'NA')
-
-            # Contar quantas vezes a heurística atingiu o ótimo (SF == SO)
-            if sf != 'NA' and so != 'NA':
-                try:
-                    if float(sf) == float(so):
-                        heur_optimal_matches += 1
-                except ValueError:
-                    pass
-
-            # Coletar tempos da heurística (Total_Time_s)
-            t_vns = row.get('Total_Time_s', 'NA')
-            if t_vns != 'NA':
-                try:
-                    vns_times.append(float(t_vns))
-                except ValueError:
-                    pass
-
-        print(f"\nEstatísticas da heurística (VNS):")
-        print(f"  Ótimos encontrados: {heur_optimal_matches}")
-        if vns_times:
-            avg_vns = sum(vns_times) / len(vns_times)
-            print(f"  Tempo médio: {avg_vns:.2f} segundos")
-            print(f"  Tempo mínimo: {min(vns_times):.2f} segundos")
-            print(f"  Tempo máximo: {max(vns_times):.2f} segundos")
-            print(f"  Tempo total: {sum(vns_times):.2f} segundos")
-        
-        # Mostrar primeiras linhas como exemplo
-        print(f"\nPrimeiras 5 linhas do arquivo gerado:")
-        for i, row in enumerate(rows[:5]):
-            print(f"  {i+1}. {row['Instance']}: VNS={row['SF']}, Gurobi={row['SOL_GUROBI']}, Ótimo={row['SO']}")
+
+    # Contar dados disponíveis a partir do DataFrame já montado, sem
+    # reler (e reparsear) o CSV que acabou de ser gravado. to_numeric
+    # com errors='coerce' transforma os 'NA' em NaN de uma vez, e as
+    # contagens viram comparações/reduções colunares, sem várias
+    # passadas em Python com try/except por linha
+    sol_gurobi = pd.to_numeric(final_df['SOL_GUROBI'], errors='coerce')
+    time_gurobi = pd.to_numeric(final_df['TIME_GUROBI'], errors='coerce')
+    so = pd.to_numeric(final_df['SO'], errors='coerce')
+    sf = pd.to_numeric(final_df['SF'], errors='coerce')
+    time_vns = pd.to_numeric(final_df['Total_Time_s'], errors='coerce')
+
+    total_instances = len(final_df)
+    gurobi_solutions = int(sol_gurobi.notna().sum())
+    # NaN nunca compara igual, então instâncias sem SOL_GUROBI ou sem
+    # SO ficam automaticamente de fora da contagem
+    optimal_matches = int((sol_gurobi == so).sum())
+
+    print(f"Total de instâncias: {total_instances}")
+    print(f"Instâncias com solução Gurobi: {gurobi_solutions}")
+    print(f"Instâncias onde Gurobi alcançou o ótimo: {optimal_matches}")
+
+    # Estatísticas de tempo do Gurobi
+    times = time_gurobi.dropna()
+    if gurobi_solutions > 0 and not times.empty:
+        print(f"\nEstatísticas de tempo do Gurobi:")
+        print(f"  Tempo médio: {times.mean():.2f} segundos")
+        print(f"  Tempo mínimo: {times.min():.2f} segundos")
+        print(f"  Tempo máximo: {times.max():.2f} segundos")
+        print(f"  Tempo total: {times.sum():.2f} segundos")
+
+    # Estatísticas da heurística (VNS)
+    heur_optimal_matches = int((sf == so).sum())
+    vns_times = time_vns.dropna()
+
+    print(f"\nEstatísticas da heurística (VNS):")
+    print(f"  Ótimos encontrados: {heur_optimal_matches}")
+    if not vns_times.empty:
+        print(f"  Tempo médio: {vns_times.mean():.2f} segundos")
+        print(f"  Tempo mínimo: {vns_times.min():.2f} segundos")
+        print(f"  Tempo máximo: {vns_times.max():.2f} segundos")
+        print(f"  Tempo total: {vns_times.sum():.2f} segundos")
+
+    # Mostrar primeiras linhas como exemplo
+    print(f"\nPrimeiras 5 linhas do arquivo gerado:")
+    for i, row in enumerate(final_df.head(5).to_dict('records')):
+        print(f"  {i+1}. {row['Instance']}: VNS={row['SF']}, Gurobi={row['SOL_GUROBI']}, Ótimo={row['SO']}")
 
 
 if __name__ == "__main__":